@@ -9,6 +9,7 @@ import asyncio
 import threading
 from mcp.server.fastmcp import FastMCP
 import json
+from enum import IntEnum
 
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QLabel, QVBoxLayout, QWidget, 
                              QDialog, QPushButton, QMenu, QGraphicsDropShadowEffect) 
@@ -21,7 +22,7 @@ import keyboard
 import tachie 
 from tachie import TACHIE_MANAGER_CLSMAP, TachieManager, ApeiriaTachieManager # Ensure ApeiriaTachieManager is imported
 from dialog import APEIRIA_DIALOGUES, DialogBox, DialogBoxConfig, create_dialog
-from pomodoro import PomodoroTimerDialog, PomodoroConfig
+from pomodoro import PomodoroTimerDialog, PomodoroConfig, PomodoroState
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +41,13 @@ class HotkeyExitMixin:
         QApplication.quit()
 
 
+class CharacterState(IntEnum):
+    """角色窗口状态 (鼠标事件中频繁比较，使用整数枚举)"""
+    NORMAL = 0
+    DRAGGING = 1
+    COLLAPSED = 2
+
+
 class AnimeCharacter(QMainWindow, HotkeyExitMixin):
     # 新增：定义一个信号，它能携带一个字符串参数（我们要显示的消息）
     # 这是实现线程安全通信的关键！
@@ -57,10 +65,7 @@ class AnimeCharacter(QMainWindow, HotkeyExitMixin):
         # 3. 设置MCP的工具
         self._setup_mcp_tools()
 
-        self.NORMAL = "normal"
-        self.DRAGGING = "dragging"
-        self.COLLAPSED = "collapsed"
-        self.current_state = self.NORMAL
+        self.current_state: CharacterState = CharacterState.NORMAL
 
         self.window_size = window_size
         
@@ -101,7 +106,20 @@ class AnimeCharacter(QMainWindow, HotkeyExitMixin):
         
         self.dialog_box: Optional[DialogBox] = None
         
-        self.animation_group: Optional[QParallelAnimationGroup] = None
+        # 折叠/展开动画只创建一次，每次仅更新起止值
+        self._collapse_anim = QPropertyAnimation(self, b"geometry")
+        self._collapse_anim.setDuration(300); self._collapse_anim.setEasingCurve(QEasingCurve.InOutQuad)
+        self._collapse_group = QParallelAnimationGroup(self)
+        self._collapse_group.addAnimation(self._collapse_anim)
+        self._collapse_group.finished.connect(self._on_collapse_animation_finished)
+
+        self._expand_anim = QPropertyAnimation(self, b"geometry")
+        self._expand_anim.setDuration(300); self._expand_anim.setEasingCurve(QEasingCurve.InOutQuad)
+        self._expand_group = QParallelAnimationGroup(self)
+        self._expand_group.addAnimation(self._expand_anim)
+        self._expand_group.finished.connect(self._on_expand_animation_finished)
+
+        self.animation_group: Optional[QParallelAnimationGroup] = None # 当前(或最近)运行的动画组
         self.normal_geometry: Optional[QRect] = self.geometry() 
         
         self.emotion_timer = QTimer(); self.emotion_timer.setSingleShot(True)
@@ -211,9 +229,9 @@ class AnimeCharacter(QMainWindow, HotkeyExitMixin):
         original_emotion = self.tachie_manager.current_emotion
         
         try:
-            if self.current_state == self.NORMAL:
+            if self.current_state == CharacterState.NORMAL:
                 pixmap = self.tachie_manager.get_composite_image()
-            elif self.current_state == self.DRAGGING:
+            elif self.current_state == CharacterState.DRAGGING:
                 # ApeiriaTachieManager has "豆豆眼拒绝" as ("negative", "ジト目")
                 if isinstance(self.tachie_manager, ApeiriaTachieManager): # Use specific manager
                     self.tachie_manager.set_base_emotion_combination("豆豆眼拒绝")
@@ -224,13 +242,13 @@ class AnimeCharacter(QMainWindow, HotkeyExitMixin):
                 # Restore original state for internal consistency if other methods read it
                 self.tachie_manager.set_base(original_base)
                 self.tachie_manager.set_emotion(original_emotion)
-            elif self.current_state == self.COLLAPSED:
+            elif self.current_state == CharacterState.COLLAPSED:
                 # For collapsed state, the image itself isn't changed here,
                 # but its rotation is handled in _on_collapse_animation_finished
                 pixmap = self.tachie_manager.get_composite_image()
 
             if pixmap and not pixmap.isNull():
-                if self.current_state != self.COLLAPSED: 
+                if self.current_state != CharacterState.COLLAPSED: 
                     self.character_label.setPixmap(pixmap)
                     # Ensure label size matches pixmap to prevent cropping/empty space
                     self.character_label.setFixedSize(pixmap.size()) 
@@ -293,15 +311,15 @@ class AnimeCharacter(QMainWindow, HotkeyExitMixin):
     def mouseDoubleClickEvent(self, event):
         if event.button() == Qt.LeftButton:
             self.was_simple_click = False # Double click is not a simple click
-            if self.current_state == self.COLLAPSED:
+            if self.current_state == CharacterState.COLLAPSED:
                 self.expand()
-            elif self.current_state == self.NORMAL:
+            elif self.current_state == CharacterState.NORMAL:
                 self.collapse_to_right()
         event.accept()
     
     def mousePressEvent(self, event):
         self.was_simple_click = False # Reset flag
-        if self.current_state == self.COLLAPSED:
+        if self.current_state == CharacterState.COLLAPSED:
             if event.button() == Qt.LeftButton:
                 self.expand() # Allow expand on single click when collapsed
             event.accept()
@@ -345,11 +363,11 @@ class AnimeCharacter(QMainWindow, HotkeyExitMixin):
             # Check if movement exceeds drag threshold to differentiate from click
             if (event.globalPos() - self.drag_start_pos).manhattanLength() >= QApplication.startDragDistance():
                 self.was_simple_click = False # It's a drag
-                if self.current_state != self.DRAGGING: # Transition to dragging state only on actual drag
-                    self.current_state = self.DRAGGING
+                if self.current_state != CharacterState.DRAGGING: # Transition to dragging state only on actual drag
+                    self.current_state = CharacterState.DRAGGING
                     self.update_character_display() # Show dragging face
 
-            if self.current_state == self.DRAGGING: # Only move if in dragging state
+            if self.current_state == CharacterState.DRAGGING: # Only move if in dragging state
                 new_top_left = event.globalPos() - self.drag_position
                 gw = self.screen_geometry.width(); gh = self.screen_geometry.height()
                 ww = self.width(); wh = self.height()
@@ -371,16 +389,16 @@ class AnimeCharacter(QMainWindow, HotkeyExitMixin):
             event.accept()
     
     def mouseReleaseEvent(self, event: Any):
-        if self.current_state == self.COLLAPSED:
+        if self.current_state == CharacterState.COLLAPSED:
             event.accept()
             return
         
         if event.button() == Qt.LeftButton:
-            if self.current_state == self.DRAGGING : # If we were actually dragging
-                self.current_state = self.NORMAL
+            if self.current_state == CharacterState.DRAGGING : # If we were actually dragging
+                self.current_state = CharacterState.NORMAL
                 self.update_character_display() # Revert to normal face
             
-            if self.was_simple_click and self.current_state == self.NORMAL: # Check the flag
+            if self.was_simple_click and self.current_state == CharacterState.NORMAL: # Check the flag
                 logger.info("左键单击立绘，显示随机对话。")
                 self.show_random_dialog()
             
@@ -453,8 +471,8 @@ class AnimeCharacter(QMainWindow, HotkeyExitMixin):
             self.pomodoro_timer_dialog.show()
         logger.info("番茄钟计时器可见性已切换。")
 
-    def on_pomodoro_session_finished(self, finished_state: str):
-        logger.info(f"角色提示：番茄钟环节 '{finished_state}' 已计时完成。")
+    def on_pomodoro_session_finished(self, finished_state: int):
+        logger.info(f"角色提示：番茄钟环节 '{PomodoroState(finished_state)}' 已计时完成。")
         apeiria_manager = isinstance(self.tachie_manager, ApeiriaTachieManager)
         
         emotion_to_set = "宽心" 
@@ -628,7 +646,7 @@ class AnimeCharacter(QMainWindow, HotkeyExitMixin):
 
 
     def collapse_to_right(self):
-        if self.current_state == self.COLLAPSED or \
+        if self.current_state == CharacterState.COLLAPSED or \
            (self.animation_group and self.animation_group.state() == QPropertyAnimation.Running):
             return
         logger.info("正在向右折叠角色。")
@@ -646,45 +664,39 @@ class AnimeCharacter(QMainWindow, HotkeyExitMixin):
         target_y = max(0, min(target_y, self.screen_geometry.height() - rotated_height))
         target_geom = QRect(target_x, target_y, rotated_width, rotated_height)
 
-        self.animation_group = QParallelAnimationGroup(self)
-        geom_anim = QPropertyAnimation(self, b"geometry")
-        geom_anim.setDuration(300); geom_anim.setStartValue(self.normal_geometry)
-        geom_anim.setEndValue(target_geom); geom_anim.setEasingCurve(QEasingCurve.InOutQuad)
-        self.animation_group.addAnimation(geom_anim)
-        self.animation_group.finished.connect(self._on_collapse_animation_finished)
+        self._collapse_anim.setStartValue(self.normal_geometry)
+        self._collapse_anim.setEndValue(target_geom)
+        self.animation_group = self._collapse_group
         
         if self.dialog_box and self.dialog_box.isVisible(): 
             self.dialog_box.hide()
         if self.pomodoro_timer_dialog and self.pomodoro_timer_dialog.isVisible(): 
             self.pomodoro_timer_dialog.hide()
-        self.current_state = self.COLLAPSED 
+        self.current_state = CharacterState.COLLAPSED 
         self.animation_group.start()
         
     def _on_collapse_animation_finished(self):
         logger.info("折叠动画完成。")
         original_pixmap = self.tachie_manager.get_composite_image()
         if original_pixmap.isNull(): return
-        transform = QTransform().rotate(270) 
-        rotated_pixmap = original_pixmap.transformed(transform, Qt.SmoothTransformation)
+        transform = QTransform().rotate(270) # 90°整数倍旋转是纯像素转置，无需平滑插值
+        rotated_pixmap = original_pixmap.transformed(transform, Qt.FastTransformation)
         self.character_label.setPixmap(rotated_pixmap)
         self.character_label.setFixedSize(rotated_pixmap.size()) 
 
     def expand(self):
-        if self.current_state != self.COLLAPSED or not self.normal_geometry or \
+        if self.current_state != CharacterState.COLLAPSED or not self.normal_geometry or \
            (self.animation_group and self.animation_group.state() == QPropertyAnimation.Running):
             return
         logger.info("正在展开角色。")
-        self.animation_group = QParallelAnimationGroup(self)
-        geom_anim = QPropertyAnimation(self, b"geometry")
-        geom_anim.setDuration(300); geom_anim.setStartValue(self.geometry())
-        geom_anim.setEndValue(self.normal_geometry); geom_anim.setEasingCurve(QEasingCurve.InOutQuad)
-        self.animation_group.addAnimation(geom_anim)
-        self.animation_group.finished.connect(self._on_expand_animation_finished)
+        self._expand_anim.setStartValue(self.geometry())
+        self._expand_anim.setEndValue(self.normal_geometry)
+        self.animation_group = self._expand_group
         self.animation_group.start()
 
     def _on_expand_animation_finished(self):
         logger.info("展开动画完成。")
-        self.current_state = self.NORMAL
+        self.current_state = CharacterState.NORMAL
         self.update_character_display() 
         self.setFixedSize(self.normal_geometry.size())
 
@@ -422,7 +422,6 @@ class AnimeCharacter(QMainWindow, HotkeyExitMixin):
             self.dialog = DialogBox(self)
         
         # 设置随机表情
-        import random
         emotions = self.tachie_manager.get_available_emotions()
         if emotions:
             random_emotion = random.choice(emotions)
@@ -452,7 +451,6 @@ class AnimeCharacter(QMainWindow, HotkeyExitMixin):
             self.dialog = DialogBox(self)
         
         # 设置随机表情
-        import random
         emotions = self.tachie_manager.get_available_emotions()
         if emotions:
             random_emotion = random.choice(emotions)
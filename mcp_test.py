@@ -1,19 +1,31 @@
 # ui_server.py
 
 import asyncio
+import sys
 from mcp.server.fastmcp import FastMCP
-import tkinter as tk
-from tkinter import messagebox
 
 # 1. 初始化 FastMCP 服务器
 # 我们给它起个名字叫 "ui_server"
 mcp = FastMCP("ui_server")
 
+# Win32 MessageBoxW 的样式标志
+MB_ICONINFORMATION = 0x00000040
+MB_TOPMOST = 0x00040000
+
 # 这是一个辅助函数，用来在独立的线程中运行GUI代码
 # 因为tkinter这种GUI库通常不是线程安全的，而且会阻塞asyncio的事件循环
 # 所以把它放到一个独立的线程里执行是最稳妥的方式
 def show_message_sync(title: str, message: str):
     """同步的GUI显示函数"""
+    if sys.platform == "win32":
+        # Windows 下直接调用原生 MessageBoxW，省去每次加载 Tk/Tcl 解释器的开销
+        import ctypes
+        ctypes.windll.user32.MessageBoxW(0, message, title, MB_ICONINFORMATION | MB_TOPMOST)
+        return
+
+    # 其他平台回退到 tkinter
+    import tkinter as tk
+    from tkinter import messagebox
     root = tk.Tk()
     root.withdraw()  # 我们不想要那个空白的根窗口，所以隐藏它
     root.attributes("-topmost", True) # 确保消息框在最上层
@@ -22,6 +34,8 @@ def show_message_sync(title: str, message: str):
 
 # 2. 定义我们的工具 (Tool)
 # FastMCP会自动从函数签名和文档字符串生成工具的定义
+# 参数模型只在注册时生成一次并缓存，调用时不会重新解析签名；
+# 保持参数均为必填的 str（不用 Optional/默认值），让这一次解析尽量简单
 @mcp.tool()
 async def display_message_box(title: str, message: str) -> str:
     """
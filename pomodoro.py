@@ -1,13 +1,16 @@
 # pomodoro.py
 import logging
 import re # Needed for parsing styles
-from typing import Optional, Any
+import time
+from enum import IntEnum
+from functools import lru_cache
+from typing import Optional, Any, Callable, Dict, NamedTuple, Tuple
 
 from PyQt5.QtWidgets import (QDialog, QLabel, QVBoxLayout, QHBoxLayout, QPushButton,
                              QProgressBar, QSpinBox, QFormLayout, QDialogButtonBox, QWidget,
                              QSizePolicy, QGraphicsDropShadowEffect)
-from PyQt5.QtCore import Qt, QTimer, QTime, pyqtSignal, QPoint, QRect, QSize
-from PyQt5.QtGui import QFont, QColor, QPainter, QPen, QBrush, QPainterPath
+from PyQt5.QtCore import Qt, QTimer, QTime, pyqtSignal, QPoint, QRect, QRectF, QSize
+from PyQt5.QtGui import QFont, QColor, QPainter, QPen, QBrush, QPainterPath, QPixmap
 
 # --- IMPORT DialogBoxConfig ---
 # Ensure dialog.py is in the same directory or Python path
@@ -29,6 +32,73 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# "MM:SS" strings for 00:00-60:59, so the per-second countdown just indexes a table
+_MAX_MIN = 61
+_TIME_STRINGS = tuple(f"{m:02d}:{s:02d}" for m in range(_MAX_MIN) for s in range(60))
+
+# Number of faint outline strokes layered to fake the blurred drop shadow
+_SHADOW_STEPS = 6
+
+
+# Each declaration is matched on its own, so their order in the QSS does not matter
+_CSS_FONT_FAMILY_RE = re.compile(r"font-family\s*:\s*([^;}]+)", re.IGNORECASE)
+_CSS_FONT_SIZE_RE = re.compile(r"font-size\s*:\s*(\d+)\s*(px|pt)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=32)
+def _parse_css_font(style: str, default_family: str = "SimSun", default_pt: int = 10) -> Tuple[str, int]:
+    """Parses (font_family, size_pt) from a QSS string; px is converted to pt (x0.75, min 8)."""
+    m = _CSS_FONT_FAMILY_RE.search(style)
+    font_family = (m.group(1).strip() if m else "") or default_family
+    m = _CSS_FONT_SIZE_RE.search(style)
+    if not m: return font_family, default_pt
+    size = int(m.group(1))
+    # Approximate conversion px to pt (common for UI design: 16px ~ 12pt)
+    return font_family, (max(8, int(size * 0.75)) if m.group(2).lower() == 'px' else size)
+
+
+def _parse_style(text_style: str, button_style: str) -> Tuple[str, int, str, int]:
+    """Parses (font_family, base_font_size_pt, button_font_family, button_font_size_val) from QSS strings."""
+    font_family, base_font_size_pt = _parse_css_font(text_style, "SimSun, Microsoft YaHei, Arial", 10)
+    # Buttons fall back to the text font, slightly smaller
+    button_font_family, button_font_size_val = _parse_css_font(button_style, font_family, base_font_size_pt - 1)
+    return font_family, base_font_size_pt, button_font_family, button_font_size_val
+
+
+class _StateUI(NamedTuple):
+    """Button setup of one pomodoro state and what the main action button does in it"""
+    main_text: Optional[str]    # None: "暂停"/"继续" depending on whether the timer runs
+    snooze_text: Optional[str]  # None: snooze button hidden
+    skip_text: str
+    skip_enabled: bool
+    action: Callable[[Any], None]
+
+
+class PomodoroState(IntEnum):
+    """番茄钟状态 (int, 便于比较/作为字典键; 显示名见 _STATE_DISPLAY)"""
+    IDLE = 0
+    WORK = 1
+    SHORT_BREAK = 2
+    LONG_BREAK = 3
+    WAITING_FOR_WORK_CONFIRMATION = 4
+    WAITING_FOR_SHORT_BREAK_CONFIRMATION = 5
+    WAITING_FOR_LONG_BREAK_CONFIRMATION = 6
+    SNOOZING = 7
+
+    def __str__(self) -> str: return _STATE_DISPLAY[self]
+
+
+_STATE_DISPLAY: Dict[PomodoroState, str] = {
+    PomodoroState.IDLE: "空闲",
+    PomodoroState.WORK: "工作中",
+    PomodoroState.SHORT_BREAK: "短时休息中",
+    PomodoroState.LONG_BREAK: "长时间休息中",
+    PomodoroState.WAITING_FOR_WORK_CONFIRMATION: "等待开始工作",
+    PomodoroState.WAITING_FOR_SHORT_BREAK_CONFIRMATION: "等待开始短休息",
+    PomodoroState.WAITING_FOR_LONG_BREAK_CONFIRMATION: "等待开始长休息",
+    PomodoroState.SNOOZING: "拖延中",
+}
+
 
 class PomodoroConfig:
     """番茄钟逻辑配置 (与视觉样式分离)"""
@@ -38,6 +108,8 @@ class PomodoroConfig:
         self.long_break_minutes: int = 15
         self.cycles_before_long_break: int = 4
         self.snooze_duration_minutes: int = 5
+        # pomodoro_state_changed 每秒发送; 默认只在剩余分钟数变化时发送
+        self.emit_state_every_second: bool = False
 
     def get_work_duration_seconds(self) -> int: return self.work_duration_minutes * 60
     def get_short_break_seconds(self) -> int: return self.short_break_minutes * 60
@@ -49,20 +121,36 @@ class PomodoroTimerDialog(QDialog):
     """番茄钟对话框 (完全自定义绘制以匹配DialogBox风格)"""
 
     # --- States and Signals ---
-    STATE_IDLE = "空闲"
-    STATE_WORK = "工作中"
-    STATE_SHORT_BREAK = "短时休息中"
-    STATE_LONG_BREAK = "长时间休息中"
-    STATE_WAITING_FOR_WORK_CONFIRMATION = "等待开始工作"
-    STATE_WAITING_FOR_SHORT_BREAK_CONFIRMATION = "等待开始短休息"
-    STATE_WAITING_FOR_LONG_BREAK_CONFIRMATION = "等待开始长休息"
-    STATE_SNOOZING = "拖延中"
-
-    pomodoro_state_changed = pyqtSignal(str, int)
-    pomodoro_session_finished = pyqtSignal(str)
+    # Aliases kept so callers can keep using PomodoroTimerDialog.STATE_*
+    STATE_IDLE = PomodoroState.IDLE
+    STATE_WORK = PomodoroState.WORK
+    STATE_SHORT_BREAK = PomodoroState.SHORT_BREAK
+    STATE_LONG_BREAK = PomodoroState.LONG_BREAK
+    STATE_WAITING_FOR_WORK_CONFIRMATION = PomodoroState.WAITING_FOR_WORK_CONFIRMATION
+    STATE_WAITING_FOR_SHORT_BREAK_CONFIRMATION = PomodoroState.WAITING_FOR_SHORT_BREAK_CONFIRMATION
+    STATE_WAITING_FOR_LONG_BREAK_CONFIRMATION = PomodoroState.WAITING_FOR_LONG_BREAK_CONFIRMATION
+    STATE_SNOOZING = PomodoroState.SNOOZING
+
+    pomodoro_state_changed = pyqtSignal(int, int)   # (PomodoroState, remaining seconds)
+    pomodoro_session_finished = pyqtSignal(int)     # PomodoroState of the finished session
     pomodoro_confirmation_required = pyqtSignal(str)
     pomodoro_snooze_activated = pyqtSignal(str)
 
+    _UI_CONFIG_BY_STATE: Dict[PomodoroState, _StateUI] = {
+        STATE_IDLE: _StateUI("开始工作", None, "跳过当前", False,
+                             lambda self: self.transition_to_state(self.STATE_WORK, start_timer=True)),
+        STATE_WORK: _StateUI(None, None, "跳过当前", True, lambda self: self._toggle_pause()),
+        STATE_SHORT_BREAK: _StateUI(None, None, "跳过当前", True, lambda self: self._toggle_pause()),
+        STATE_LONG_BREAK: _StateUI(None, None, "跳过当前", True, lambda self: self._toggle_pause()),
+        STATE_SNOOZING: _StateUI(None, None, "跳过当前", True, lambda self: self._toggle_pause()),
+        STATE_WAITING_FOR_WORK_CONFIRMATION: _StateUI("开始工作", "摸鱼5分钟", "跳过工作", True,
+                                                      lambda self: self.transition_to_state(self.STATE_WORK, start_timer=True)),
+        STATE_WAITING_FOR_SHORT_BREAK_CONFIRMATION: _StateUI("开始短休息", "再卷5分钟", "跳过短休息", True,
+                                                             lambda self: self.transition_to_state(self.STATE_SHORT_BREAK, start_timer=True)),
+        STATE_WAITING_FOR_LONG_BREAK_CONFIRMATION: _StateUI("开始长休息", "再卷5分钟", "跳过长休息", True,
+                                                            lambda self: self.transition_to_state(self.STATE_LONG_BREAK, start_timer=True)),
+    }
+
     def __init__(self, parent: Optional[QWidget] = None,
                  pomodoro_logic_config: Optional[PomodoroConfig] = None,
                  dialog_style_config: Optional[DialogBoxConfig] = None):
@@ -70,18 +158,39 @@ class PomodoroTimerDialog(QDialog):
 
         self.logic_config = pomodoro_logic_config if pomodoro_logic_config else PomodoroConfig()
         self.style_config = dialog_style_config if dialog_style_config else DialogBoxConfig()
+        self._rebuild_duration_map()
 
         self.setAttribute(Qt.WA_TranslucentBackground)
+        self._compute_margins()
 
-        self.current_state: str = self.STATE_IDLE
+        self.current_state: PomodoroState = self.STATE_IDLE
         self.cycles_completed: int = 0
         self.remaining_seconds: int = 0
         self.session_type_to_confirm_after_snooze: str = ""
         self.snoozed_original_session_type: str = ""
+        self._force_transition: bool = False # Makes the next transition_to_state run even if it is a no-op
 
+        # Single-shot timer re-armed by _schedule_next_tick to fire on whole-second
+        # boundaries before the monotonic deadline of the running session
         self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
         self.timer.timeout.connect(self.update_timer_countdown)
+        self._deadline: float = 0.0
+        self._paused_residual: Optional[float] = None # Exact seconds left when paused
         self._drag_pos: Optional[QPoint] = None
+        self._pending_move_pos: Optional[QPoint] = None # Latest drag target, applied once per event-loop pass
+
+        # Last values pushed to widgets; setters are skipped when nothing changed
+        self._last_status_text: Optional[str] = None
+        self._last_time_text: Optional[str] = None
+        self._last_cycles_text: Optional[str] = None
+        self._last_progress: int = -1
+        self._last_button_state: Optional[Tuple[PomodoroState, bool]] = None # (state, timer active)
+        self._last_emit_minute: int = -1 # Remaining minute last reported via pomodoro_state_changed
+        self._settings_dialog: Optional["PomodoroSettingsDialog"] = None # Created on first open, then reused
+        # pomodoro_state_changed from chained transitions is coalesced into one emit per event-loop pass
+        self._pending_emit: Optional[Tuple[PomodoroState, int]] = None
+        self._emit_scheduled: bool = False
 
         self._init_ui_widgets()
         self._apply_widget_styles()
@@ -89,13 +198,32 @@ class PomodoroTimerDialog(QDialog):
 
         # Calculate minimum size based on content + borders/title
         self._calculate_and_set_initial_size()
+        self._rebuild_paint_cache() # The drop shadow is baked into the chrome pixmap (no QGraphicsEffect)
 
-        if self.style_config.shadow_enabled:
-            shadow = QGraphicsDropShadowEffect(self) # Parent it
-            shadow.setBlurRadius(self.style_config.shadow_blur_radius)
-            shadow.setColor(self.style_config.shadow_color)
-            shadow.setOffset(self.style_config.shadow_offset_x, self.style_config.shadow_offset_y)
-            self.setGraphicsEffect(shadow)
+    def _compute_margins(self):
+        """ Caches the shadow-derived insets, which only depend on style_config """
+        cfg = self.style_config
+        half_blur = cfg.shadow_blur_radius // 2
+
+        # Insets of the title bar/content area from the dialog edge
+        if cfg.shadow_enabled:
+            self._margin_left = max(0, half_blur - cfg.shadow_offset_x)
+            self._margin_top = max(0, half_blur - cfg.shadow_offset_y)
+            self._margin_right = max(0, half_blur + cfg.shadow_offset_x)
+            self._margin_bottom = max(0, half_blur + cfg.shadow_offset_y)
+        else:
+            self._margin_left = self._margin_top = self._margin_right = self._margin_bottom = 1
+        self._title_bar_bottom_y = self._margin_top + cfg.padding // 2 + cfg.title_height + cfg.padding // 2
+
+        # Insets of the painted frame, leaving room for the shadow
+        # (assuming positive offset means bottom-right)
+        shadow_margin_x = cfg.shadow_offset_x if cfg.shadow_enabled else 0
+        shadow_margin_y = cfg.shadow_offset_y if cfg.shadow_enabled else 0
+        blur_radius_margin = half_blur if cfg.shadow_enabled else 1 # Approx margin for blur
+        self._frame_margins = (blur_radius_margin - min(0, shadow_margin_x),
+                               blur_radius_margin - min(0, shadow_margin_y),
+                               blur_radius_margin + max(0, shadow_margin_x),
+                               blur_radius_margin + max(0, shadow_margin_y))
 
     def _calculate_and_set_initial_size(self):
         """ Estimates minimum needed size and sets initial dialog size """
@@ -147,6 +275,7 @@ class PomodoroTimerDialog(QDialog):
         main_layout.addWidget(self.cycles_label)
 
         self.main_action_button = QPushButton("开始工作")
+        self.main_action_button.setObjectName("mainActionButton") # Bold style via container QSS
         self.main_action_button.setMinimumHeight(28)
         self.main_action_button.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         self.main_action_button.clicked.connect(self.handle_main_action_button_click)
@@ -185,24 +314,8 @@ class PomodoroTimerDialog(QDialog):
     def _apply_widget_styles(self):
         """Applies styles derived from DialogBoxConfig to internal widgets."""
         cfg = self.style_config
-        font_family = "SimSun, Microsoft YaHei, Arial" # Default fallback
-        base_font_size_pt = 10 # Default fallback
-
-        # Extract font info more safely
-        try:
-            style_font_family = cfg.text_style.split("font-family:", 1)[1].split(";", 1)[0].strip()
-            if style_font_family: font_family = style_font_family
-        except IndexError: pass # Keep default if parsing fails
-
-        try:
-            style_font_size_str = cfg.text_style.split("font-size:", 1)[1].split(";", 1)[0].strip().lower()
-            if 'px' in style_font_size_str:
-                # Approximate conversion px to pt (common for UI design: 16px ~ 12pt)
-                px_val = int(re.sub(r'[^\d]', '', style_font_size_str))
-                base_font_size_pt = max(8, int(px_val * 0.75)) # Ensure minimum size
-            elif 'pt' in style_font_size_str:
-                base_font_size_pt = int(re.sub(r'[^\d]', '', style_font_size_str))
-        except (IndexError, ValueError): pass # Keep default if parsing fails
+        font_family, base_font_size_pt, button_font_family, button_font_size_val = \
+            _parse_style(cfg.text_style, cfg.button_style)
 
         # Label Styling (QSS for general, QFont for specifics)
         label_qss = f"""
@@ -213,7 +326,6 @@ class PomodoroTimerDialog(QDialog):
                 background-color: transparent;
             }}
         """
-        self.setStyleSheet(label_qss)
 
         status_font = QFont(font_family.split(",")[0].strip().replace("'", ""), base_font_size_pt + 1)
         self.status_label.setFont(status_font)
@@ -225,26 +337,21 @@ class PomodoroTimerDialog(QDialog):
 
 
         # Button Styling (Use QSS from config directly)
-        # Make sure the button QSS includes font settings if desired, otherwise set font separately
-        button_qss = cfg.button_style
-        all_buttons = self.container_widget.findChildren(QPushButton)
-        try: # Extract button font from QSS for QFont override if needed
-             button_font_family = button_qss.split("font-family:", 1)[1].split(";", 1)[0].strip()
-             button_font_size_str = button_qss.split("font-size:", 1)[1].split(";", 1)[0].strip().lower()
-             if 'pt' in button_font_size_str: button_font_size_val = int(re.sub(r'[^\d]', '', button_font_size_str))
-             elif 'px' in button_font_size_str: button_font_size_val = max(8, int(int(re.sub(r'[^\d]', '', button_font_size_str)) * 0.75))
-             else: button_font_size_val = base_font_size_pt # Fallback
-        except (IndexError, ValueError):
-             button_font_family = font_family
-             button_font_size_val = base_font_size_pt -1 # Slightly smaller for buttons
-
-        for button in all_buttons:
-            button.setStyleSheet(button_qss) # Apply the style sheet from DialogBoxConfig
-            # Optional: Override font using QFont if QSS font handling is inconsistent
-            button.setFont(QFont(button_font_family.split(",")[0].strip().replace("'", ""), button_font_size_val))
-
-        # Special style for main button
-        self.main_action_button.setFont(QFont(button_font_family.split(",")[0].strip().replace("'", ""), button_font_size_val + 1, QFont.Bold))
+        # One style sheet on the container covers every button, so Qt parses/cascades it once
+        button_font_qss = f"""
+            QPushButton {{
+                font-family: {button_font_family};
+                font-size: {button_font_size_val}pt;
+            }}
+            QPushButton#mainActionButton {{
+                font-size: {button_font_size_val + 1}pt;
+                font-weight: bold;
+            }}
+        """
+        self.container_widget.setStyleSheet(label_qss + "\n" + cfg.button_style + "\n" + button_font_qss)
+
+        # Custom-painted frame/title
+        self._rebuild_paint_styles()
 
 
         # Progress Bar Styling
@@ -263,112 +370,135 @@ class PomodoroTimerDialog(QDialog):
         """)
 
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
+    def _rebuild_paint_styles(self):
+        """Builds the brush, pens and title font for paintEvent; they depend on style_config only, not on size."""
+        cfg = self.style_config
+        self._bg_brush = QBrush(QColor(cfg.background_color))
+        self._pen_light = QPen(QColor(cfg.border_light_color), 1)
+        self._pen_dark = QPen(QColor(cfg.border_dark_color), 1)
+        self._pen_medium = QPen(QColor(cfg.border_medium_color), 1)
+        self._title_color = QColor(cfg.title_color)
+        title_font_family = cfg.title_font.split(",")[0].strip().replace("'", "")
+        self._title_font = QFont(title_font_family if title_font_family else "Microsoft YaHei", cfg.title_font_size)
+
+        # Soft shadow: strokes of the frame outline from widest to narrowest, each faint, so
+        # their overlap fades in towards the frame edge like a blur of radius shadow_blur_radius/2
+        self._shadow_pens = []
+        self._shadow_fill = None
+        if cfg.shadow_enabled:
+            spread = max(1, cfg.shadow_blur_radius // 2)
+            steps = min(_SHADOW_STEPS, spread)
+            layer_color = QColor(cfg.shadow_color)
+            layer_color.setAlpha(max(1, cfg.shadow_color.alpha() // (steps + 1)))
+            for i in range(steps, 0, -1):
+                self._shadow_pens.append(QPen(layer_color, 2 * spread * i / steps, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
+            self._shadow_fill = QBrush(layer_color)
+
+    def _rebuild_paint_cache(self):
+        """Precomputes the size-dependent frame path and bevel/title/separator coordinates used by paintEvent."""
         cfg = self.style_config
-        
-        # Adjust rect based on shadow offset IF shadow is enabled AND WA_TranslucentBackground is set
-        # This ensures we paint within the non-shadow area.
-        shadow_margin_x = self.style_config.shadow_offset_x if cfg.shadow_enabled else 0
-        shadow_margin_y = self.style_config.shadow_offset_y if cfg.shadow_enabled else 0
-        blur_radius_margin = cfg.shadow_blur_radius // 2 if cfg.shadow_enabled else 1 # Approx margin for blur
-
-        # Adjust based on which side the shadow offsets towards (assuming positive offset means bottom-right)
-        left_margin = blur_radius_margin - min(0, shadow_margin_x)
-        top_margin = blur_radius_margin - min(0, shadow_margin_y)
-        right_margin = blur_radius_margin + max(0, shadow_margin_x)
-        bottom_margin = blur_radius_margin + max(0, shadow_margin_y)
 
+        # Paint within the non-shadow area (WA_TranslucentBackground leaves the margins transparent)
+        left_margin, top_margin, right_margin, bottom_margin = self._frame_margins
         paint_rect = self.rect().adjusted(left_margin, top_margin, -right_margin, -bottom_margin)
+        left, top, right, bottom = paint_rect.left(), paint_rect.top(), paint_rect.right(), paint_rect.bottom()
 
-        path = QPainterPath()
         corner = cfg.corner_size
-        
-        # Path with rounded corners using arcTo
-        path.moveTo(paint_rect.left() + corner, paint_rect.top())
-        path.lineTo(paint_rect.right() - corner, paint_rect.top())
-        path.arcTo(paint_rect.right() - 2 * corner, paint_rect.top(), 2 * corner, 2 * corner, 90, -90)
-        path.lineTo(paint_rect.right(), paint_rect.bottom() - corner)
-        path.arcTo(paint_rect.right() - 2 * corner, paint_rect.bottom() - 2 * corner, 2 * corner, 2 * corner, 0, -90)
-        path.lineTo(paint_rect.left() + corner, paint_rect.bottom())
-        path.arcTo(paint_rect.left(), paint_rect.bottom() - 2 * corner, 2 * corner, 2 * corner, 270, -90)
-        path.lineTo(paint_rect.left(), paint_rect.top() + corner)
-        path.arcTo(paint_rect.left(), paint_rect.top(), 2 * corner, 2 * corner, 180, -90)
-        path.closeSubpath()
+
+        # Fill path; spans left..right / top..bottom like the bevel lines (QRectF(paint_rect) would be 1px larger)
+        path = QPainterPath()
+        path.addRoundedRect(QRectF(left, top, right - left, bottom - top), corner, corner)
+
+        self._cached_paint_rect = paint_rect
+        self._cached_path = path
+
+        # 3D border: light on top/left, dark on bottom/right. Tuples are (x1, y1, x2, y2)
+        self._light_edges = ((left + corner, top, right - corner, top),         # Top Edge
+                             (left, top + corner, left, bottom - corner))       # Left Edge
+        self._dark_edges = ((left + corner, bottom, right - corner, bottom),    # Bottom Edge
+                            (right, top + corner, right, bottom - corner))      # Right Edge
+        # Corner arcs (x, y, w, h, start, span) - Top-Left/Bottom-Left light, Top-Right/Bottom-Right dark
+        self._light_arcs = ((left, top, 2 * corner, 2 * corner, 180 * 16, -90 * 16),
+                            (left, bottom - 2 * corner, 2 * corner, 2 * corner, 270 * 16, -90 * 16))
+        self._dark_arcs = ((right - 2 * corner, top, 2 * corner, 2 * corner, 90 * 16, -90 * 16),
+                           (right - 2 * corner, bottom - 2 * corner, 2 * corner, 2 * corner, 0 * 16, -90 * 16))
+
+        self._title_rect = QRect(left + cfg.padding, top + cfg.padding // 3,
+                                 paint_rect.width() - 2 * cfg.padding, cfg.title_height)
+        self._separator_line = (left + cfg.padding, top + cfg.title_height + cfg.padding // 2,
+                                right - cfg.padding, top + cfg.title_height + cfg.padding // 2)
+
+        self._render_chrome_pixmap()
+
+    def _render_chrome_pixmap(self):
+        """Pre-renders background, 3D border, title and separator for the current size into one pixmap."""
+        if self.size().isEmpty():
+            self._chrome_pixmap = QPixmap()
+            return
+
+        dpr = self.devicePixelRatioF()
+        pixmap = QPixmap(self.size() * dpr)
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.transparent)
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        if self._shadow_pens:
+            shadow_path = self._cached_path.translated(self.style_config.shadow_offset_x, self.style_config.shadow_offset_y)
+            painter.setBrush(Qt.NoBrush)
+            for pen in self._shadow_pens:
+                painter.setPen(pen)
+                painter.drawPath(shadow_path)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(self._shadow_fill)
+            painter.drawPath(shadow_path)
 
         # Fill background
-        painter.setBrush(QBrush(QColor(cfg.background_color)))
+        painter.setBrush(self._bg_brush)
         painter.setPen(Qt.NoPen)
-        painter.drawPath(path)
+        painter.drawPath(self._cached_path)
 
         # --- Draw 3D Border ---
-        pen_light = QPen(QColor(cfg.border_light_color), 1)
-        pen_dark = QPen(QColor(cfg.border_dark_color), 1)
-
-        # Top Edge
-        painter.setPen(pen_light)
-        painter.drawLine(paint_rect.left() + corner, paint_rect.top(), paint_rect.right() - corner, paint_rect.top())
-        # Left Edge
-        painter.drawLine(paint_rect.left(), paint_rect.top() + corner, paint_rect.left(), paint_rect.bottom() - corner)
-        # Bottom Edge
-        painter.setPen(pen_dark)
-        painter.drawLine(paint_rect.left() + corner, paint_rect.bottom(), paint_rect.right() - corner, paint_rect.bottom())
-        # Right Edge
-        painter.drawLine(paint_rect.right(), paint_rect.top() + corner, paint_rect.right(), paint_rect.bottom() - corner)
-
-        # Draw corner arcs with appropriate pens for 3D effect
-        # Top-Left (Light)
-        painter.setPen(pen_light)
-        painter.drawArc(paint_rect.left(), paint_rect.top(), 2 * corner, 2 * corner, 180 * 16, -90 * 16)
-        # Top-Right (Dark on vertical, Light on horizontal - mimic bevel)
-        # Simplification: Draw dark arc, may need more lines for true bevel
-        painter.setPen(pen_dark)
-        painter.drawArc(paint_rect.right() - 2 * corner, paint_rect.top(), 2 * corner, 2 * corner, 90 * 16, -90 * 16)
-        # Bottom-Left (Dark on horizontal, Light on vertical - mimic bevel)
-        # Simplification: Draw light arc
-        painter.setPen(pen_light)
-        painter.drawArc(paint_rect.left(), paint_rect.bottom() - 2 * corner, 2 * corner, 2 * corner, 270 * 16, -90 * 16)
-        # Bottom-Right (Dark)
-        painter.setPen(pen_dark)
-        painter.drawArc(paint_rect.right() - 2 * corner, paint_rect.bottom() - 2 * corner, 2 * corner, 2 * corner, 0 * 16, -90 * 16)
-
+        painter.setPen(self._pen_light)
+        for x1, y1, x2, y2 in self._light_edges: painter.drawLine(x1, y1, x2, y2)
+        for arc in self._light_arcs: painter.drawArc(*arc)
+        painter.setPen(self._pen_dark)
+        for x1, y1, x2, y2 in self._dark_edges: painter.drawLine(x1, y1, x2, y2)
+        for arc in self._dark_arcs: painter.drawArc(*arc)
 
         # Draw Title Text
-        title_rect = QRect(paint_rect.left() + cfg.padding, paint_rect.top() + cfg.padding // 3,
-                           paint_rect.width() - 2 * cfg.padding, cfg.title_height)
-        painter.setPen(QColor(cfg.title_color))
-        title_font_family = cfg.title_font.split(",")[0].strip().replace("'", "")
-        painter.setFont(QFont(title_font_family if title_font_family else "Microsoft YaHei", cfg.title_font_size))
-        painter.drawText(title_rect, Qt.AlignLeft | Qt.AlignVCenter, "番茄工作法计时器")
+        painter.setPen(self._title_color)
+        painter.setFont(self._title_font)
+        painter.drawText(self._title_rect, Qt.AlignLeft | Qt.AlignVCenter, "番茄工作法计时器")
+
+        # Draw Separator Line: dark line first, light line below for 3D effect
+        x1, y1, x2, y2 = self._separator_line
+        painter.setPen(self._pen_medium)
+        painter.drawLine(x1, y1, x2, y2)
+        painter.setPen(self._pen_light)
+        painter.drawLine(x1, y1 + 1, x2, y2 + 1)
+        painter.end()
+
+        self._chrome_pixmap = pixmap
 
-        # Draw Separator Line
-        separator_y = paint_rect.top() + cfg.title_height + cfg.padding // 2
-        # Dark line first
-        painter.setPen(QPen(QColor(cfg.border_medium_color), 1))
-        painter.drawLine(paint_rect.left() + cfg.padding, separator_y,
-                         paint_rect.right() - cfg.padding, separator_y)
-        # Light line below for 3D effect
-        painter.setPen(QPen(QColor(cfg.border_light_color), 1))
-        painter.drawLine(paint_rect.left() + cfg.padding, separator_y + 1,
-                         paint_rect.right() - cfg.padding, separator_y + 1)
+    def paintEvent(self, event):
+        # The chrome only changes with size, so each repaint (e.g. the per-second time label)
+        # is a single blit of the dirty area; WA_TranslucentBackground clears it beforehand.
+        painter = QPainter(self)
+        painter.setClipRegion(event.region())
+        painter.drawPixmap(0, 0, self._chrome_pixmap)
 
 
     def resizeEvent(self, event: Any): # type: ignore
         super().resizeEvent(event)
         cfg = self.style_config
 
-        # Calculate margins for the container, considering shadow and desired padding
-        shadow_margin_x_left = max(0, cfg.shadow_blur_radius // 2 - cfg.shadow_offset_x) if cfg.shadow_enabled else 1
-        shadow_margin_y_top = max(0, cfg.shadow_blur_radius // 2 - cfg.shadow_offset_y) if cfg.shadow_enabled else 1
-        shadow_margin_x_right = max(0, cfg.shadow_blur_radius // 2 + cfg.shadow_offset_x) if cfg.shadow_enabled else 1
-        shadow_margin_y_bottom = max(0, cfg.shadow_blur_radius // 2 + cfg.shadow_offset_y) if cfg.shadow_enabled else 1
-
-        # Total inset from dialog edge to where content container starts
-        total_inset_x_left = shadow_margin_x_left + cfg.padding
-        total_inset_y_top = shadow_margin_y_top + cfg.padding // 2 + cfg.title_height + cfg.padding // 2
-        total_inset_x_right = shadow_margin_x_right + cfg.padding
-        total_inset_y_bottom = shadow_margin_y_bottom + cfg.padding
+        # Total inset from dialog edge to where content container starts (shadow margins + padding)
+        total_inset_x_left = self._margin_left + cfg.padding
+        total_inset_y_top = self._title_bar_bottom_y
+        total_inset_x_right = self._margin_right + cfg.padding
+        total_inset_y_bottom = self._margin_bottom + cfg.padding
 
         container_x = total_inset_x_left
         container_y = total_inset_y_top
@@ -381,18 +511,14 @@ class PomodoroTimerDialog(QDialog):
 
         self.container_widget.setGeometry(container_x, container_y, container_width, container_height)
         # logger.debug(f"Dialog resize: {self.size()}, Container geo: {self.container_widget.geometry()}")
+        self._rebuild_paint_cache()
 
     # --- Mouse Events for Dragging ---
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
-            shadow_margin_y_top = max(0, self.style_config.shadow_blur_radius // 2 - self.style_config.shadow_offset_y) if self.style_config.shadow_enabled else 1
-            title_bar_bottom = shadow_margin_y_top + self.style_config.padding // 2 + self.style_config.title_height + self.style_config.padding // 2
-            # Define clickable title bar bounds more precisely
-            shadow_margin_x_left = max(0, self.style_config.shadow_blur_radius // 2 - self.style_config.shadow_offset_x) if self.style_config.shadow_enabled else 1
-            shadow_margin_x_right = max(0, self.style_config.shadow_blur_radius // 2 + self.style_config.shadow_offset_x) if self.style_config.shadow_enabled else 1
-            
-            if event.y() >= shadow_margin_y_top and event.y() < title_bar_bottom \
-               and event.x() >= shadow_margin_x_left and event.x() < self.width() - shadow_margin_x_right :
+            # Clickable title bar bounds
+            if event.y() >= self._margin_top and event.y() < self._title_bar_bottom_y \
+               and event.x() >= self._margin_left and event.x() < self.width() - self._margin_right :
                     self._drag_pos = event.globalPos() - self.frameGeometry().topLeft()
                     event.accept()
                     return
@@ -407,9 +533,18 @@ class PomodoroTimerDialog(QDialog):
 
     def mouseMoveEvent(self, event):
         if event.buttons() == Qt.LeftButton and self._drag_pos is not None:
-            self.move(event.globalPos() - self._drag_pos); event.accept()
+            # Coalesce bursts of mouse moves into a single window move per event-loop pass
+            if self._pending_move_pos is None:
+                QTimer.singleShot(0, self._apply_pending_move)
+            self._pending_move_pos = event.globalPos() - self._drag_pos
+            event.accept()
         else: event.ignore()
 
+    def _apply_pending_move(self):
+        if self._pending_move_pos is not None:
+            self.move(self._pending_move_pos)
+            self._pending_move_pos = None
+
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.LeftButton and self._drag_pos is not None:
             self._drag_pos = None; event.accept()
@@ -422,107 +557,122 @@ class PomodoroTimerDialog(QDialog):
     #  handle_reset_button_click, go_to_idle_state, transition_to_state,
     #  handle_settings_button_click, showEvent, closeEvent MUST BE COPIED HERE from the previous full version)
     def update_ui_for_current_state(self): # Ensure this method exists and is called
-        self.status_label.setText(f"当前状态: {self.current_state}")
-        self.snooze_button.setVisible(False) 
-        self.skip_button.setText("跳过当前") 
-        self.main_action_button.setEnabled(True)
-        self.skip_button.setEnabled(True)
-
-        is_timer_active = self.timer.isActive()
-
-        if self.current_state == self.STATE_IDLE:
-            self.main_action_button.setText("开始工作")
-            self.skip_button.setEnabled(False)
-        elif self.current_state in [self.STATE_WORK, self.STATE_SHORT_BREAK, self.STATE_LONG_BREAK, self.STATE_SNOOZING]:
-            self.main_action_button.setText("暂停" if is_timer_active else "继续")
-        elif self.current_state == self.STATE_WAITING_FOR_WORK_CONFIRMATION:
-            self.main_action_button.setText("开始工作")
-            self.snooze_button.setVisible(True)
-            self.snooze_button.setText("摸鱼5分钟")
-            self.skip_button.setText("跳过工作")
-        elif self.current_state == self.STATE_WAITING_FOR_SHORT_BREAK_CONFIRMATION:
-            self.main_action_button.setText("开始短休息")
-            self.snooze_button.setVisible(True)
-            self.snooze_button.setText("再卷5分钟")
-            self.skip_button.setText("跳过短休息")
-        elif self.current_state == self.STATE_WAITING_FOR_LONG_BREAK_CONFIRMATION:
-            self.main_action_button.setText("开始长休息")
-            self.snooze_button.setVisible(True)
-            self.snooze_button.setText("再卷5分钟")
-            self.skip_button.setText("跳过长休息")
+        status_text = f"当前状态: {_STATE_DISPLAY[self.current_state]}"
+        if status_text != self._last_status_text:
+            self.status_label.setText(status_text)
+            self._last_status_text = status_text
+
+        # Button texts/visibility only depend on the state and whether the timer runs
+        button_state = (self.current_state, self.timer.isActive())
+        if button_state != self._last_button_state:
+            self._last_button_state = button_state
+            self._update_buttons_for_state(button_state[1])
 
         self.update_timer_and_progress_display()
         self.update_cycles_display()
 
+    def _update_buttons_for_state(self, is_timer_active: bool):
+        ui = self._UI_CONFIG_BY_STATE[self.current_state]
+        self.main_action_button.setEnabled(True)
+        self.main_action_button.setText(ui.main_text if ui.main_text is not None else ("暂停" if is_timer_active else "继续"))
+        self.snooze_button.setVisible(ui.snooze_text is not None)
+        if ui.snooze_text is not None: self.snooze_button.setText(ui.snooze_text)
+        self.skip_button.setText(ui.skip_text)
+        self.skip_button.setEnabled(ui.skip_enabled)
+
+    def _set_progress_value(self, value: int):
+        if value != self._last_progress:
+            self.progress_bar.setValue(value)
+            self._last_progress = value
+
     def update_timer_and_progress_display(self):
         minutes = self.remaining_seconds // 60
         seconds = self.remaining_seconds % 60
-        self.time_label.setText(f"{minutes:02d}:{seconds:02d}")
+        time_text = _TIME_STRINGS[self.remaining_seconds] if minutes < _MAX_MIN else f"{minutes:02d}:{seconds:02d}"
+        if time_text != self._last_time_text:
+            self.time_label.setText(time_text)
+            self._last_time_text = time_text
 
-        total_duration_for_progress = 0
-        if self.current_state == self.STATE_WORK: total_duration_for_progress = self.logic_config.get_work_duration_seconds()
-        elif self.current_state == self.STATE_SHORT_BREAK: total_duration_for_progress = self.logic_config.get_short_break_seconds()
-        elif self.current_state == self.STATE_LONG_BREAK: total_duration_for_progress = self.logic_config.get_long_break_seconds()
-        elif self.current_state == self.STATE_SNOOZING: total_duration_for_progress = self.logic_config.get_snooze_duration_seconds()
-
-        if total_duration_for_progress > 0:
-            progress = int(((total_duration_for_progress - self.remaining_seconds) / total_duration_for_progress) * 100)
-            self.progress_bar.setValue(progress)
-        else:
-            self.progress_bar.setValue(0)
+        total = self._duration_for_state.get(self.current_state, 0)
+        # Integer percentage; _set_progress_value skips the Qt call unless it changed (~100 times per session)
+        self._set_progress_value(((total - self.remaining_seconds) * 100) // total if total > 0 else 0)
 
     def update_cycles_display(self):
         cycles_in_set = self.cycles_completed % self.logic_config.cycles_before_long_break
         total_for_long_break = self.logic_config.cycles_before_long_break
-        self.cycles_label.setText(f"本大轮已完成: {cycles_in_set}/{total_for_long_break} (总计: {self.cycles_completed}轮)")
-
-    def set_time_for_state(self, state_to_set_time_for: str):
-        if state_to_set_time_for == self.STATE_WORK: self.remaining_seconds = self.logic_config.get_work_duration_seconds()
-        elif state_to_set_time_for == self.STATE_SHORT_BREAK: self.remaining_seconds = self.logic_config.get_short_break_seconds()
-        elif state_to_set_time_for == self.STATE_LONG_BREAK: self.remaining_seconds = self.logic_config.get_long_break_seconds()
-        elif state_to_set_time_for == self.STATE_SNOOZING: self.remaining_seconds = self.logic_config.get_snooze_duration_seconds()
-        elif state_to_set_time_for == self.STATE_IDLE: self.remaining_seconds = self.logic_config.get_work_duration_seconds()
-        else: 
-            if state_to_set_time_for == self.STATE_WAITING_FOR_WORK_CONFIRMATION: self.remaining_seconds = self.logic_config.get_work_duration_seconds()
-            elif state_to_set_time_for == self.STATE_WAITING_FOR_SHORT_BREAK_CONFIRMATION: self.remaining_seconds = self.logic_config.get_short_break_seconds()
-            elif state_to_set_time_for == self.STATE_WAITING_FOR_LONG_BREAK_CONFIRMATION: self.remaining_seconds = self.logic_config.get_long_break_seconds()
+        cycles_text = f"本大轮已完成: {cycles_in_set}/{total_for_long_break} (总计: {self.cycles_completed}轮)"
+        if cycles_text != self._last_cycles_text:
+            self.cycles_label.setText(cycles_text)
+            self._last_cycles_text = cycles_text
+
+    def _rebuild_duration_map(self):
+        """Maps each state to its full duration in seconds (call whenever logic_config changes)."""
+        work = self.logic_config.get_work_duration_seconds()
+        short_break = self.logic_config.get_short_break_seconds()
+        long_break = self.logic_config.get_long_break_seconds()
+        self._duration_for_state: Dict[PomodoroState, int] = {
+            self.STATE_IDLE: work,
+            self.STATE_WORK: work,
+            self.STATE_SHORT_BREAK: short_break,
+            self.STATE_LONG_BREAK: long_break,
+            self.STATE_SNOOZING: self.logic_config.get_snooze_duration_seconds(),
+            self.STATE_WAITING_FOR_WORK_CONFIRMATION: work,
+            self.STATE_WAITING_FOR_SHORT_BREAK_CONFIRMATION: short_break,
+            self.STATE_WAITING_FOR_LONG_BREAK_CONFIRMATION: long_break,
+        }
+
+    def set_time_for_state(self, state_to_set_time_for: PomodoroState):
+        self._paused_residual = None
+        if state_to_set_time_for in self._duration_for_state:
+            self.remaining_seconds = self._duration_for_state[state_to_set_time_for]
         # Update display immediately after setting time
         self.update_timer_and_progress_display() 
 
     def handle_main_action_button_click(self):
         logger.debug(f"主操作按钮点击。当前状态: {self.current_state}, 计时器活动: {self.timer.isActive()}")
-        
-        if self.current_state == self.STATE_IDLE:
-            self.transition_to_state(self.STATE_WORK, start_timer=True)
-        elif self.current_state in [self.STATE_WORK, self.STATE_SHORT_BREAK, self.STATE_LONG_BREAK, self.STATE_SNOOZING]:
-            if self.timer.isActive():
-                self.timer.stop()
-                logger.info(f"计时器已暂停: {self.current_state}")
-            else: 
-                if self.remaining_seconds > 0:
-                    self.timer.start(1000)
-                    logger.info(f"计时器已继续: {self.current_state}")
-        elif self.current_state == self.STATE_WAITING_FOR_WORK_CONFIRMATION:
-            self.transition_to_state(self.STATE_WORK, start_timer=True)
-        elif self.current_state == self.STATE_WAITING_FOR_SHORT_BREAK_CONFIRMATION:
-            self.transition_to_state(self.STATE_SHORT_BREAK, start_timer=True)
-        elif self.current_state == self.STATE_WAITING_FOR_LONG_BREAK_CONFIRMATION:
-            self.transition_to_state(self.STATE_LONG_BREAK, start_timer=True)
-        
+        self._UI_CONFIG_BY_STATE[self.current_state].action(self)
         self.update_ui_for_current_state() 
 
+    def _toggle_pause(self):
+        if self.timer.isActive():
+            self.timer.stop()
+            self._paused_residual = max(0.0, self._deadline - time.monotonic())
+            logger.info(f"计时器已暂停: {self.current_state}")
+        elif self.remaining_seconds > 0:
+            self._start_countdown(self._paused_residual)
+            logger.info(f"计时器已继续: {self.current_state}")
+
+    def _start_countdown(self, residual: Optional[float] = None):
+        """Starts (or resumes with the exact residual) the countdown of remaining_seconds."""
+        self._deadline = time.monotonic() + (residual if residual is not None else self.remaining_seconds)
+        self._paused_residual = None
+        self._schedule_next_tick()
+
+    def _schedule_next_tick(self):
+        remaining_ms = int((self._deadline - time.monotonic()) * 1000)
+        if not self.isVisible() and self.receivers(self.pomodoro_state_changed) == 0:
+            # Nothing shows the seconds: wake up once at the deadline, showEvent resumes per-second ticks
+            self.timer.start(max(1, remaining_ms))
+            return
+        self.timer.start(remaining_ms % 1000 or 1000)
+
     def update_timer_countdown(self):
-        if self.remaining_seconds > 0:
-            self.remaining_seconds -= 1
-            if self.timer.isActive():
-                 self.pomodoro_state_changed.emit(self.current_state, self.remaining_seconds)
+        # Derive the remaining time from the deadline instead of decrementing, so ticks never drift
+        new_remaining = max(0, round(self._deadline - time.monotonic()))
+        if new_remaining != self.remaining_seconds:
+            self.remaining_seconds = new_remaining
+            cur_min = new_remaining // 60
+            if cur_min != self._last_emit_minute or self.logic_config.emit_state_every_second:
+                self._last_emit_minute = cur_min
+                self.pomodoro_state_changed.emit(self.current_state, self.remaining_seconds)
         
         if self.remaining_seconds <= 0: 
-            if self.timer.isActive(): 
-                self.timer.stop()
-                self.process_timed_session_completion()
+            self.process_timed_session_completion() # Refreshes the full UI via transition_to_state
+        else:
+            self._schedule_next_tick()
         
-        self.update_ui_for_current_state() 
+        # A tick only changes the remaining time; buttons/status are refreshed on state changes
+        self.update_timer_and_progress_display()
 
 
     def process_timed_session_completion(self):
@@ -530,7 +680,7 @@ class PomodoroTimerDialog(QDialog):
         logger.info(f"计时环节结束: {finished_session}")
         
         if finished_session in [self.STATE_WORK, self.STATE_SHORT_BREAK, self.STATE_LONG_BREAK]:
-            self.pomodoro_session_finished.emit(finished_session)
+            self._notify(self.pomodoro_session_finished, finished_session)
 
         next_confirmation_type = ""
         new_state_after_completion = self.STATE_IDLE 
@@ -554,7 +704,7 @@ class PomodoroTimerDialog(QDialog):
         
         self.transition_to_state(new_state_after_completion, start_timer=False)
         if next_confirmation_type:
-            self.pomodoro_confirmation_required.emit(next_confirmation_type)
+            self._notify(self.pomodoro_confirmation_required, next_confirmation_type)
 
     def handle_snooze_button_click(self):
         snooze_applied_to = "" 
@@ -568,7 +718,7 @@ class PomodoroTimerDialog(QDialog):
 
         self.transition_to_state(self.STATE_SNOOZING, start_timer=True)
         logger.info(f"环节已拖延 ({self.logic_config.snooze_duration_minutes}分钟). 下一个确认: {self.session_type_to_confirm_after_snooze}")
-        if snooze_applied_to: self.pomodoro_snooze_activated.emit(snooze_applied_to)
+        if snooze_applied_to: self._notify(self.pomodoro_snooze_activated, snooze_applied_to)
 
     def handle_skip_button_click(self):
         logger.info(f"跳过按钮点击。当前状态: {self.current_state}")
@@ -577,54 +727,90 @@ class PomodoroTimerDialog(QDialog):
         if current_active_session_state in [self.STATE_WORK, self.STATE_SHORT_BREAK, self.STATE_LONG_BREAK, self.STATE_SNOOZING]:
             self.remaining_seconds = 0; self.process_timed_session_completion() 
         elif current_active_session_state == self.STATE_WAITING_FOR_WORK_CONFIRMATION:
-            self.pomodoro_session_finished.emit(self.STATE_WORK); self.cycles_completed +=1 
+            self._notify(self.pomodoro_session_finished, self.STATE_WORK); self.cycles_completed +=1 
             if self.cycles_completed % self.logic_config.cycles_before_long_break == 0:
-                self.transition_to_state(self.STATE_WAITING_FOR_LONG_BREAK_CONFIRMATION); self.pomodoro_confirmation_required.emit("long_break")
-            else: self.transition_to_state(self.STATE_WAITING_FOR_SHORT_BREAK_CONFIRMATION); self.pomodoro_confirmation_required.emit("short_break")
+                self.transition_to_state(self.STATE_WAITING_FOR_LONG_BREAK_CONFIRMATION); self._notify(self.pomodoro_confirmation_required, "long_break")
+            else: self.transition_to_state(self.STATE_WAITING_FOR_SHORT_BREAK_CONFIRMATION); self._notify(self.pomodoro_confirmation_required, "short_break")
         elif current_active_session_state in [self.STATE_WAITING_FOR_SHORT_BREAK_CONFIRMATION, self.STATE_WAITING_FOR_LONG_BREAK_CONFIRMATION]:
             original_break_type = self.STATE_SHORT_BREAK if current_active_session_state == self.STATE_WAITING_FOR_SHORT_BREAK_CONFIRMATION else self.STATE_LONG_BREAK
-            self.pomodoro_session_finished.emit(original_break_type)
-            self.transition_to_state(self.STATE_WAITING_FOR_WORK_CONFIRMATION); self.pomodoro_confirmation_required.emit("work")
+            self._notify(self.pomodoro_session_finished, original_break_type)
+            self.transition_to_state(self.STATE_WAITING_FOR_WORK_CONFIRMATION); self._notify(self.pomodoro_confirmation_required, "work")
         logger.info(f"环节已跳过. 当前状态更新为: {self.current_state}")
 
     def handle_reset_button_click(self):
         self.timer.stop(); self.cycles_completed = 0; self.go_to_idle_state()
-        self.pomodoro_state_changed.emit(self.current_state, self.remaining_seconds) 
+        self._queue_state_changed(self.current_state, self.remaining_seconds)
         logger.info("番茄钟已完全重置。")
 
     def go_to_idle_state(self):
+        # Init/reset/show re-enter idle on purpose to reload the work duration and clear progress
+        self._force_transition = True
         self.transition_to_state(self.STATE_IDLE, start_timer=False)
 
-    def transition_to_state(self, new_state: str, start_timer: bool = False):
+    def transition_to_state(self, new_state: PomodoroState, start_timer: bool = False):
+        if new_state == self.current_state and self.timer.isActive() == start_timer and not self._force_transition:
+            return
+        self._force_transition = False
         logger.debug(f"状态转换: 从 {self.current_state} 到 {new_state}, 启动计时器: {start_timer}")
         self.current_state = new_state
         self.set_time_for_state(new_state) 
         if start_timer and self.remaining_seconds > 0:
-            self.timer.start(1000)
+            self._start_countdown()
             # Only emit state changed if timer actually starts counting down
-            self.pomodoro_state_changed.emit(self.current_state, self.remaining_seconds)
+            self._last_emit_minute = self.remaining_seconds // 60
+            self._queue_state_changed(self.current_state, self.remaining_seconds)
         elif not start_timer: self.timer.stop()
         # Reset progress unless resuming an active timer
         if not (start_timer and self.current_state in [self.STATE_WORK, self.STATE_SHORT_BREAK, self.STATE_LONG_BREAK, self.STATE_SNOOZING]):
-             self.progress_bar.setValue(0)
+             self._set_progress_value(0)
         self.update_ui_for_current_state()
 
+    def _notify(self, signal, *args):
+        """Emits a session signal only when something is connected to it (e.g. the dialog used standalone)"""
+        if self.receivers(signal) > 0:
+            signal.emit(*args)
+
+    def _queue_state_changed(self, state: PomodoroState, seconds: int):
+        """Records the latest state/seconds and emits pomodoro_state_changed once the current handler returns"""
+        self._pending_emit = (state, seconds)
+        if not self._emit_scheduled:
+            self._emit_scheduled = True
+            QTimer.singleShot(0, self._flush_state_changed)
+
+    def _flush_state_changed(self):
+        self._emit_scheduled = False
+        if self._pending_emit is not None:
+            state, seconds = self._pending_emit
+            self._pending_emit = None
+            self.pomodoro_state_changed.emit(state, seconds)
+
     def handle_settings_button_click(self):
         timer_was_active = self.timer.isActive()
-        if timer_was_active: self.timer.stop()
-        settings_dialog = PomodoroSettingsDialog(self.logic_config, self.style_config, self)
-        if settings_dialog.exec_():
-            self.logic_config = settings_dialog.get_logic_config()
+        if timer_was_active:
+            self.timer.stop()
+            self._paused_residual = max(0.0, self._deadline - time.monotonic())
+        if self._settings_dialog is None:
+            self._settings_dialog = PomodoroSettingsDialog(self.logic_config, self.style_config, self)
+        else:
+            self._settings_dialog.load_logic_config(self.logic_config)
+        if self._settings_dialog.exec_():
+            self.logic_config = self._settings_dialog.get_logic_config()
+            self._rebuild_duration_map()
             logger.info("番茄钟设置已更新。")
             current_is_non_timed_state = self.current_state in [self.STATE_IDLE, self.STATE_WAITING_FOR_WORK_CONFIRMATION, self.STATE_WAITING_FOR_SHORT_BREAK_CONFIRMATION, self.STATE_WAITING_FOR_LONG_BREAK_CONFIRMATION]
             if current_is_non_timed_state: self.set_time_for_state(self.current_state)
             elif self.current_state == self.STATE_SNOOZING: self.set_time_for_state(self.STATE_SNOOZING)
             self.update_ui_for_current_state() 
         if timer_was_active and self.current_state not in [self.STATE_IDLE, self.STATE_WAITING_FOR_WORK_CONFIRMATION, self.STATE_WAITING_FOR_SHORT_BREAK_CONFIRMATION, self.STATE_WAITING_FOR_LONG_BREAK_CONFIRMATION] and self.remaining_seconds > 0 :
-            self.timer.start(1000)
+            self._start_countdown(self._paused_residual)
+            self.update_ui_for_current_state()
 
     def showEvent(self, event):
         super().showEvent(event)
+        if self.timer.isActive():
+            # May have been sleeping until the deadline while hidden; catch up and re-arm per-second ticks
+            self.timer.stop()
+            self.update_timer_countdown()
         self.update_ui_for_current_state()
         if self.current_state == self.STATE_IDLE and self.remaining_seconds == 0: self.go_to_idle_state()
 
@@ -642,19 +828,18 @@ class PomodoroSettingsDialog(QDialog):
                  parent: Optional[QWidget] = None):
         super().__init__(parent, Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint | Qt.Tool)
         
-        self.new_logic_config = PomodoroConfig() 
-        self.new_logic_config.work_duration_minutes = current_logic_config.work_duration_minutes
-        self.new_logic_config.short_break_minutes = current_logic_config.short_break_minutes
-        self.new_logic_config.long_break_minutes = current_logic_config.long_break_minutes
-        self.new_logic_config.cycles_before_long_break = current_logic_config.cycles_before_long_break
-        self.new_logic_config.snooze_duration_minutes = current_logic_config.snooze_duration_minutes
-        
         self.style_config = current_style_config 
         self.setAttribute(Qt.WA_TranslucentBackground)
         self._drag_pos: Optional[QPoint] = None
+        self._bg_path: Optional[QPainterPath] = None # Background path, cached per size
+        self._bg_path_size: Optional[QSize] = None
+        self._bg_paint_rect = QRect()
+        title_font_family = self.style_config.title_font.split(",")[0].strip().replace("'", "")
+        self._title_font = QFont(title_font_family if title_font_family else "Microsoft YaHei", self.style_config.title_font_size)
 
         self._init_settings_ui_widgets()
         self._apply_settings_dialog_style()
+        self.load_logic_config(current_logic_config)
 
         est_content_h = 5 * 25 + 4 * 6 + 30 
         title_border_h = self.style_config.title_height + (self.style_config.padding * 2) + (self.style_config.shadow_blur_radius // 2 if self.style_config.shadow_enabled else 0) * 2
@@ -678,19 +863,19 @@ class PomodoroSettingsDialog(QDialog):
                                    self.style_config.padding // 2, self.style_config.padding // 2)
         layout.setSpacing(6)
 
-        self.work_spinbox = QSpinBox(); self.work_spinbox.setRange(1, 120); self.work_spinbox.setValue(self.new_logic_config.work_duration_minutes)
+        self.work_spinbox = QSpinBox(); self.work_spinbox.setRange(1, 120)
         layout.addRow("工作时长 (分钟):", self.work_spinbox)
 
-        self.short_break_spinbox = QSpinBox(); self.short_break_spinbox.setRange(1, 60); self.short_break_spinbox.setValue(self.new_logic_config.short_break_minutes)
+        self.short_break_spinbox = QSpinBox(); self.short_break_spinbox.setRange(1, 60)
         layout.addRow("短休息时长 (分钟):", self.short_break_spinbox)
 
-        self.long_break_spinbox = QSpinBox(); self.long_break_spinbox.setRange(1, 120); self.long_break_spinbox.setValue(self.new_logic_config.long_break_minutes)
+        self.long_break_spinbox = QSpinBox(); self.long_break_spinbox.setRange(1, 120)
         layout.addRow("长休息时长 (分钟):", self.long_break_spinbox)
 
-        self.cycles_spinbox = QSpinBox(); self.cycles_spinbox.setRange(1, 10); self.cycles_spinbox.setValue(self.new_logic_config.cycles_before_long_break)
+        self.cycles_spinbox = QSpinBox(); self.cycles_spinbox.setRange(1, 10)
         layout.addRow("长休息前轮次:", self.cycles_spinbox)
 
-        self.snooze_spinbox = QSpinBox(); self.snooze_spinbox.setRange(1, 30); self.snooze_spinbox.setValue(self.new_logic_config.snooze_duration_minutes)
+        self.snooze_spinbox = QSpinBox(); self.snooze_spinbox.setRange(1, 30)
         layout.addRow("拖延单位 (分钟):", self.snooze_spinbox)
 
         self.button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
@@ -700,45 +885,53 @@ class PomodoroSettingsDialog(QDialog):
         self.button_box.rejected.connect(self.reject)
         layout.addRow(self.button_box)
 
+    def load_logic_config(self, current_logic_config: PomodoroConfig):
+        """Copies the given config into a fresh one and shows its values; called on every (re)open"""
+        self.new_logic_config = PomodoroConfig() 
+        self.new_logic_config.work_duration_minutes = current_logic_config.work_duration_minutes
+        self.new_logic_config.short_break_minutes = current_logic_config.short_break_minutes
+        self.new_logic_config.long_break_minutes = current_logic_config.long_break_minutes
+        self.new_logic_config.cycles_before_long_break = current_logic_config.cycles_before_long_break
+        self.new_logic_config.snooze_duration_minutes = current_logic_config.snooze_duration_minutes
+        self.new_logic_config.emit_state_every_second = current_logic_config.emit_state_every_second
+
+        self.work_spinbox.setValue(self.new_logic_config.work_duration_minutes)
+        self.short_break_spinbox.setValue(self.new_logic_config.short_break_minutes)
+        self.long_break_spinbox.setValue(self.new_logic_config.long_break_minutes)
+        self.cycles_spinbox.setValue(self.new_logic_config.cycles_before_long_break)
+        self.snooze_spinbox.setValue(self.new_logic_config.snooze_duration_minutes)
+
     def _apply_settings_dialog_style(self):
         cfg = self.style_config 
-        font_family = "SimSun, Microsoft YaHei, Arial"; base_font_size_pt = 10
-        try:
-            style_font_family = cfg.text_style.split("font-family:", 1)[1].split(";", 1)[0].strip(); font_family = style_font_family if style_font_family else font_family
-            style_font_size_str = cfg.text_style.split("font-size:", 1)[1].split(";", 1)[0].strip().lower()
-            if 'px' in style_font_size_str: base_font_size_pt = max(8, int(int(re.sub(r'[^\d]', '', style_font_size_str)) * 0.75))
-            elif 'pt' in style_font_size_str: base_font_size_pt = int(re.sub(r'[^\d]', '', style_font_size_str))
-        except Exception: pass
+        # Same parser as the timer dialog, so both dialogs agree on fonts for one config
+        font_family, base_font_size_pt, button_font_family, button_font_size_val = _parse_style(cfg.text_style, cfg.button_style)
 
         common_widget_style = f""" color: {cfg.text_color}; font-family: {font_family}; font-size: {base_font_size_pt -1}pt; background: transparent; """
         self.container_widget.setStyleSheet(f""" QLabel {{ {common_widget_style} }} QSpinBox {{ color: {cfg.text_color}; font-family: {font_family}; font-size: {base_font_size_pt -1}pt; background-color: {cfg.border_light_color}; border: 1px solid {cfg.border_medium_color}; padding: 1px 2px; min-height: 20px; }} /* QPushButton styling will be inherited or set below */ """)
+        # One QFont shared by all dialog buttons
+        button_font = QFont(button_font_family.split(",")[0].strip().replace("'", ""), button_font_size_val)
         for button in self.button_box.findChildren(QPushButton):
             button.setStyleSheet(cfg.button_style)
-            try:
-                 button_font_family = cfg.button_style.split("font-family:", 1)[1].split(";", 1)[0].strip(); button_font_size_str = cfg.button_style.split("font-size:", 1)[1].split(";", 1)[0].strip().lower()
-                 if 'pt' in button_font_size_str: button_font_size_val = int(re.sub(r'[^\d]', '', button_font_size_str))
-                 elif 'px' in button_font_size_str: button_font_size_val = max(8, int(int(re.sub(r'[^\d]', '', button_font_size_str)) * 0.75))
-                 else: button_font_size_val = base_font_size_pt -1
-                 button.setFont(QFont(button_font_family.split(",")[0].strip().replace("'", ""), button_font_size_val))
-            except Exception: pass # Use QSS font if parsing fails
+            button.setFont(button_font)
 
-    def paintEvent(self, event): 
-        painter = QPainter(self); painter.setRenderHint(QPainter.Antialiasing); cfg = self.style_config
-        shadow_margin_x = cfg.shadow_offset_x if cfg.shadow_enabled else 0; shadow_margin_y = cfg.shadow_offset_y if cfg.shadow_enabled else 0
-        blur_radius_margin = cfg.shadow_blur_radius // 2 if cfg.shadow_enabled else 1
+    def _rebuild_bg_path(self):
+        cfg = self.style_config; enabled = cfg.shadow_enabled; corner = cfg.corner_size
+        shadow_margin_x = cfg.shadow_offset_x if enabled else 0; shadow_margin_y = cfg.shadow_offset_y if enabled else 0
+        blur_radius_margin = cfg.shadow_blur_radius // 2 if enabled else 1
         left_margin = blur_radius_margin - min(0, shadow_margin_x); top_margin = blur_radius_margin - min(0, shadow_margin_y)
         right_margin = blur_radius_margin + max(0, shadow_margin_x); bottom_margin = blur_radius_margin + max(0, shadow_margin_y)
         paint_rect = self.rect().adjusted(left_margin, top_margin, -right_margin, -bottom_margin)
 
-        path = QPainterPath(); corner = cfg.corner_size
-        path.moveTo(paint_rect.left() + corner, paint_rect.top()); path.lineTo(paint_rect.right() - corner, paint_rect.top())
-        path.arcTo(paint_rect.right() - 2 * corner, paint_rect.top(), 2 * corner, 2 * corner, 90, -90)
-        path.lineTo(paint_rect.right(), paint_rect.bottom() - corner)
-        path.arcTo(paint_rect.right() - 2 * corner, paint_rect.bottom() - 2 * corner, 2 * corner, 2 * corner, 0, -90)
-        path.lineTo(paint_rect.left() + corner, paint_rect.bottom())
-        path.arcTo(paint_rect.left(), paint_rect.bottom() - 2 * corner, 2 * corner, 2 * corner, 270, -90)
-        path.lineTo(paint_rect.left(), paint_rect.top() + corner)
-        path.arcTo(paint_rect.left(), paint_rect.top(), 2 * corner, 2 * corner, 180, -90); path.closeSubpath()
+        path = QPainterPath()
+        path.addRoundedRect(QRectF(paint_rect.left(), paint_rect.top(), paint_rect.right() - paint_rect.left(), paint_rect.bottom() - paint_rect.top()), corner, corner)
+        self._bg_path = path; self._bg_path_size = self.size(); self._bg_paint_rect = paint_rect
+
+    def paintEvent(self, event): 
+        painter = QPainter(self); painter.setRenderHint(QPainter.Antialiasing); cfg = self.style_config
+        painter.setClipRegion(event.region()) # Only the invalidated area (e.g. a spinbox) is repainted
+        pad = cfg.padding; th = cfg.title_height; corner = cfg.corner_size
+        if self._bg_path is None or self._bg_path_size != self.size(): self._rebuild_bg_path()
+        paint_rect = self._bg_paint_rect; path = self._bg_path
 
         painter.setBrush(QBrush(QColor(cfg.background_color))); painter.setPen(Qt.NoPen); painter.drawPath(path)
         pen_light = QPen(QColor(cfg.border_light_color), 1); pen_dark = QPen(QColor(cfg.border_dark_color), 1)
@@ -749,39 +942,44 @@ class PomodoroSettingsDialog(QDialog):
         painter.setPen(pen_light); painter.drawArc(paint_rect.left(), paint_rect.bottom() - 2 * corner, 2 * corner, 2 * corner, 270 * 16, -90 * 16)
         painter.setPen(pen_dark); painter.drawArc(paint_rect.right() - 2 * corner, paint_rect.bottom() - 2 * corner, 2 * corner, 2 * corner, 0 * 16, -90 * 16)
 
-        title_rect = QRect(paint_rect.left() + cfg.padding, paint_rect.top() + cfg.padding // 3, paint_rect.width() - 2 * cfg.padding, cfg.title_height)
-        painter.setPen(QColor(cfg.title_color)); title_font_family = cfg.title_font.split(",")[0].strip().replace("'", "")
-        painter.setFont(QFont(title_font_family if title_font_family else "Microsoft YaHei", cfg.title_font_size))
+        title_rect = QRect(paint_rect.left() + pad, paint_rect.top() + pad // 3, paint_rect.width() - 2 * pad, th)
+        painter.setPen(QColor(cfg.title_color)); painter.setFont(self._title_font)
         painter.drawText(title_rect, Qt.AlignLeft | Qt.AlignVCenter, "番茄钟设置") 
-        separator_y = paint_rect.top() + cfg.title_height + cfg.padding // 2
-        painter.setPen(QPen(QColor(cfg.border_medium_color), 1)); painter.drawLine(paint_rect.left() + cfg.padding, separator_y, paint_rect.right() - cfg.padding, separator_y)
-        painter.setPen(QPen(QColor(cfg.border_light_color), 1)); painter.drawLine(paint_rect.left() + cfg.padding, separator_y + 1, paint_rect.right() - cfg.padding, separator_y + 1)
+        separator_y = paint_rect.top() + th + pad // 2
+        painter.setPen(QPen(QColor(cfg.border_medium_color), 1)); painter.drawLine(paint_rect.left() + pad, separator_y, paint_rect.right() - pad, separator_y)
+        painter.setPen(pen_light); painter.drawLine(paint_rect.left() + pad, separator_y + 1, paint_rect.right() - pad, separator_y + 1)
 
 
     def resizeEvent(self, event: Any): # type: ignore
         super().resizeEvent(event)
+        self._bg_path = None # Rebuilt for the new size on the next paint
         cfg = self.style_config
-        shadow_margin_x_left = max(0, cfg.shadow_blur_radius // 2 - cfg.shadow_offset_x) if cfg.shadow_enabled else 1
-        shadow_margin_y_top = max(0, cfg.shadow_blur_radius // 2 - cfg.shadow_offset_y) if cfg.shadow_enabled else 1
-        shadow_margin_x_right = max(0, cfg.shadow_blur_radius // 2 + cfg.shadow_offset_x) if cfg.shadow_enabled else 1
-        shadow_margin_y_bottom = max(0, cfg.shadow_blur_radius // 2 + cfg.shadow_offset_y) if cfg.shadow_enabled else 1
-
-        title_area_total_height = cfg.padding // 2 + cfg.title_height + cfg.padding # Approx total height used by title area
+        enabled = cfg.shadow_enabled; half_blur = cfg.shadow_blur_radius // 2; ox = cfg.shadow_offset_x; oy = cfg.shadow_offset_y
+        pad = cfg.padding; th = cfg.title_height
+        shadow_margin_x_left = max(0, half_blur - ox) if enabled else 1
+        shadow_margin_y_top = max(0, half_blur - oy) if enabled else 1
+        shadow_margin_x_right = max(0, half_blur + ox) if enabled else 1
+        shadow_margin_y_bottom = max(0, half_blur + oy) if enabled else 1
+
+        title_area_total_height = pad // 2 + th + pad # Approx total height used by title area
         
-        container_x = shadow_margin_x_left + cfg.padding // 2
+        container_x = shadow_margin_x_left + pad // 2
         container_y = shadow_margin_y_top + title_area_total_height
-        container_width = self.width() - shadow_margin_x_left - shadow_margin_x_right - cfg.padding
-        container_height = self.height() - shadow_margin_y_top - title_area_total_height - shadow_margin_y_bottom - cfg.padding // 2
+        container_width = self.width() - shadow_margin_x_left - shadow_margin_x_right - pad
+        container_height = self.height() - shadow_margin_y_top - title_area_total_height - shadow_margin_y_bottom - pad // 2
 
         container_width = max(0, container_width); container_height = max(0, container_height)
         self.container_widget.setGeometry(container_x, container_y, container_width, container_height)
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
-            shadow_margin_y_top = max(0, self.style_config.shadow_blur_radius // 2 - self.style_config.shadow_offset_y) if self.style_config.shadow_enabled else 1
-            title_bar_clickable_height = shadow_margin_y_top + self.style_config.padding // 2 + self.style_config.title_height + self.style_config.padding // 2
-            shadow_margin_x_left = max(0, self.style_config.shadow_blur_radius // 2 - self.style_config.shadow_offset_x) if self.style_config.shadow_enabled else 1
-            shadow_margin_x_right = max(0, self.style_config.shadow_blur_radius // 2 + self.style_config.shadow_offset_x) if self.style_config.shadow_enabled else 1
+            cfg = self.style_config
+            enabled = cfg.shadow_enabled; half_blur = cfg.shadow_blur_radius // 2; ox = cfg.shadow_offset_x; oy = cfg.shadow_offset_y
+            pad = cfg.padding
+            shadow_margin_y_top = max(0, half_blur - oy) if enabled else 1
+            title_bar_clickable_height = shadow_margin_y_top + pad // 2 + cfg.title_height + pad // 2
+            shadow_margin_x_left = max(0, half_blur - ox) if enabled else 1
+            shadow_margin_x_right = max(0, half_blur + ox) if enabled else 1
             if event.y() >= shadow_margin_y_top and event.y() < title_bar_clickable_height and event.x() >= shadow_margin_x_left and event.x() < self.width() - shadow_margin_x_right :
                  self._drag_pos = event.globalPos() - self.frameGeometry().topLeft(); event.accept(); return
             if self.container_widget.geometry().contains(event.pos()): event.ignore()
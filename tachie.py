@@ -2,12 +2,13 @@ import os
 import sys
 import logging
 import re
+from collections import OrderedDict
 from typing import List, Dict, Any, Union, Tuple, Dict, Optional, Callable
 import cv2
 import numpy as np
 
 from PyQt5.QtCore import Qt, QPropertyAnimation, QRect, QTimer
-from PyQt5.QtGui import QMovie, QPixmap, QPainter, QImage
+from PyQt5.QtGui import QMovie, QPixmap, QImage, QImageReader
 
 logger = logging.getLogger(__name__)
 
@@ -24,8 +25,101 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+def _lru_get(cache: OrderedDict, key):
+    """从 OrderedDict 形式的 LRU 中取值, 命中时标记为最近使用"""
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _lru_put(cache: OrderedDict, key, value, maxsize: int):
+    """写入 LRU, 超出 maxsize 时淘汰最久未使用的项"""
+    cache[key] = value
+    if len(cache) > maxsize:
+        cache.popitem(last=False)
+
+
+# 模块级解码缓存: (路径, 缩放比例) -> (mtime, 预乘 alpha 的 BGRA 数组), 多个 TachieManager 实例共享同一份解码结果
+# 大小按实际复用的图层估计: 3 个基础姿势常驻, 外加最近用到的 2 个表情差分
+_IMG_CACHE_SIZE = 5
+_IMG_CACHE: "OrderedDict[Tuple[str, float], Tuple[float, np.ndarray]]" = OrderedDict()
+
+
+def _composite_over(base: np.ndarray, overlay: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """预乘 alpha 下的 over 混合: out = overlay + base * (255 - overlay_a) / 255, 结果不会超过 255
+    只分配一个 uint16 中间数组 (及单通道 alpha), 结果直接写入调用方给出的 uint8 数组 out"""
+    inv_alpha = overlay[:, :, 3:4].astype(np.uint16)
+    np.subtract(255, inv_alpha, out=inv_alpha)
+    acc = base.astype(np.uint16)
+    acc *= inv_alpha
+    acc += 127
+    acc //= 255
+    acc += overlay
+    np.copyto(out, acc, casting="unsafe")
+    return out
+
+
+def _mask_bbox(non_transparent: np.ndarray) -> Optional[QRect]:
+    """布尔掩码中 True 区域的包围盒, 全为 False 时返回 None"""
+    rows = non_transparent.any(axis=1)
+    if not rows.any():
+        return None
+    cols = non_transparent.any(axis=0)
+    # argmax 找到首个/末个非透明行列, 避免 np.where 生成索引数组
+    height, width = non_transparent.shape
+    y_min = int(np.argmax(rows)); y_max = height - 1 - int(np.argmax(rows[::-1]))
+    x_min = int(np.argmax(cols)); x_max = width - 1 - int(np.argmax(cols[::-1]))
+    return QRect(x_min, y_min, x_max - x_min + 1, y_max - y_min + 1)
+
+
+def _bgra_to_pixmap(arr: np.ndarray) -> QPixmap:
+    """预乘 BGRA 数组转 QPixmap; 小端下 BGRA 字节序即 ARGB32, QImage 直接包装缓冲区
+    格式相同时 fromImage 可能与 QImage 共享内存, 因此先 copy() 成 Qt 自有数据, 数组之后可被复用或释放"""
+    height, width = arr.shape[:2]
+    image = QImage(arr.data, width, height, arr.strides[0], QImage.Format_ARGB32_Premultiplied)
+    return QPixmap.fromImage(image.copy())
+
+
+def _load_bgra(path, scale: float = 1.0) -> Optional[np.ndarray]:
+    """用 cv2 解码 PNG 为预乘 alpha 的 uint8 BGRA 数组, scale < 1 时缩小后再缓存
+    (按路径、比例与修改时间缓存), 失败返回 None"""
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    hit = _lru_get(_IMG_CACHE, (path, scale))
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+
+    # cv2.imread 在 Windows 上无法打开含中文的路径, 改为读字节后 imdecode
+    arr = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    if arr is None:
+        return None
+    if arr.dtype == np.uint16:
+        arr = (arr >> 8).astype(np.uint8)
+    if arr.ndim == 2:
+        arr = cv2.cvtColor(arr, cv2.COLOR_GRAY2BGRA)
+    elif arr.shape[2] == 3:
+        arr = cv2.cvtColor(arr, cv2.COLOR_BGR2BGRA)
+    # 直通 alpha 转预乘 alpha; 只按 alpha 缩放前三个通道, 与 RGB/BGR 顺序无关
+    arr = cv2.cvtColor(arr, cv2.COLOR_RGBA2mRGBA)
+    if scale < 1.0:
+        # 在预乘数据上做区域平均缩小, 边缘不会出现颜色溢出
+        new_size = (max(1, round(arr.shape[1] * scale)), max(1, round(arr.shape[0] * scale)))
+        arr = cv2.resize(arr, new_size, interpolation=cv2.INTER_AREA)
+    _lru_put(_IMG_CACHE, (path, scale), (mtime, arr), _IMG_CACHE_SIZE)
+    return arr
+
+
 class TachieManager:
     """管理角色立绘资源的类"""
+    COMPOSITE_CACHE_SIZE = 16 # 最多保留的组合立绘/头像数量
+    RAW_CACHE_SIZE = 2 # 最多保留的未缩放组合图数量 (加载分辨率, 每张数 MB), 只有 get_head_image 写入
+    # (资源目录, 基础图像名) -> (目录 mtime, 基础姿势, 表情差分); 所有实例共享, 目录未变化时不再 listdir
+    _SCAN_CACHE: Dict[Tuple[str, str], Tuple[float, List[str], List[str]]] = {}
+    LOAD_OVERSAMPLE = 3 # 图层按显示尺寸的该倍数加载, 为裁掉透明边缘后的缩放留足分辨率
+
     def __init__(self, base_dir="images/apeiria", base_image_name="CH01_01_00", image_size=(300, 500)):
         """初始化TachieManager"""
         self.base_dir = base_dir
@@ -39,6 +133,13 @@ class TachieManager:
         self.current_emotion = "普通"      # 默认表情
         self.available_bases = []         # 可用的基础姿势
         self.available_emotions = {}      # 每个基础姿势可用的表情
+        self._emotion_sets: Dict[str, frozenset] = {} # 同上, 用于 set_emotion 的 O(1) 校验
+        # (姿势, 表情, 尺寸) -> 缩放后的组合立绘; 头像另以 (该键, head_location) 缓存
+        self._composite_cache: "OrderedDict[Tuple[str, str, Tuple[int, int]], QPixmap]" = OrderedDict()
+        self._composite_scratch: Optional[np.ndarray] = None # 组合用的输出缓冲区, 尺寸不变时复用
+        self._raw_cache: "OrderedDict[Tuple[str, str, Tuple[int, int]], Tuple[QPixmap, Optional[QRect]]]" = OrderedDict() # 未缩放组合图及其非透明区域
+        self._bbox_cache: Dict[Tuple[str, float, float], Optional[QRect]] = {} # (路径, mtime, 缩放比例) -> 图层非透明区域
+        self._head_cache: "OrderedDict[Tuple[Tuple[str, str, Tuple[int, int]], float], QPixmap]" = OrderedDict()
         
         # 扫描并加载可用的资源
         self._scan_resources()
@@ -48,37 +149,46 @@ class TachieManager:
         if not os.path.exists(self.base_dir):
             print(f"警告: 资源目录 {self.base_dir} 不存在")
             return
-            
-        files = os.listdir(self.base_dir)
-        
-        # 找出所有基础姿势, CH01_01_00+(normal|positive|negative).png
-        # base_files = [file for file in files if "+" in file]
-        pattern = rf"{self.base_image_name}\+.*\.png"
-        base_files = [file for file in files if re.match(pattern, file)]
-        for file in base_files:
-            base_name = file.split(".")[0].split("+")[-1]
-            if base_name not in self.available_bases:
-                self.available_bases.append(base_name)
-                
-        # 找出所有表情差分
+
+        cache_key = (self.base_dir, self.base_image_name)
+        dir_mtime = os.stat(self.base_dir).st_mtime
+        hit = self._SCAN_CACHE.get(cache_key)
+        if hit is not None and hit[0] == dir_mtime:
+            bases, emotions = hit[1], hit[2]
+        else:
+            bases, emotions = self._list_resources()
+            self._SCAN_CACHE[cache_key] = (dir_mtime, bases, emotions)
+
+        # 拷贝一份, 避免实例间共享可变列表
+        self.available_bases = list(bases)
+        # 表情差分与基础姿势无关, 所有姿势共用同一组表情
         for base in self.available_bases:
-            # all files that start with base name and "_{emotion}.png"
-            # base_prefix = base.rsplit("_", 1)[0]  
-            # emotion_files = [f for f in files if f.startswith(f"{base_prefix}_") and "_" in f.split("_", 2)[2]]
-            # 找出所有基础姿势, CH01_01_00_(害羞|高兴).png
-            pattern = rf"{self.base_image_name}_.*\.png"
-            emotion_files = [file for file in files if re.match(pattern, file)]
-
-            emotions = []
-            for file in emotion_files:
-                emotion = file.split(self.base_image_name + "_")[1].split(".")[0]
-                emotions.append(emotion)
-            
-            self.available_emotions[base] = emotions
+            self.available_emotions[base] = list(emotions)
+        self._emotion_sets = {b: frozenset(es) for b, es in self.available_emotions.items()}
             
         print(f"已加载 {len(self.available_bases)} 个基础姿势, {[len(emotions) for emotions in self.available_emotions.values()]} 个表情差分")
         print(f"可用基础姿势: {self.available_bases}")
         print(f"可用表情: {self.available_emotions}")
+
+    def _list_resources(self) -> Tuple[List[str], List[str]]:
+        """列出目录中的基础姿势与表情差分名称"""
+        files = os.listdir(self.base_dir)
+
+        # 基础姿势 CH01_01_00+(normal|positive|negative).png, 表情差分 CH01_01_00_(害羞|高兴).png
+        # 基础名经 re.escape 转义后编译一次, 文件只遍历一遍
+        base_re = re.compile(re.escape(self.base_image_name) + r"\+(.+)\.png$")
+        emo_re = re.compile(re.escape(self.base_image_name) + r"_(.+)\.png$")
+        bases, emotions = [], []
+        for file in files:
+            m = base_re.match(file)
+            if m:
+                if m.group(1) not in bases:
+                    bases.append(m.group(1))
+                continue
+            m = emo_re.match(file)
+            if m:
+                emotions.append(m.group(1))
+        return bases, emotions
         
     def get_base_image_path(self, base_name=None):
         """获取基础姿势图像的路径"""
@@ -99,115 +209,169 @@ class TachieManager:
     
     def set_base(self, base_name):
         """设置当前基础姿势"""
-        logger.info(f"设置基础姿势为 {base_name}")
         if base_name in self.available_bases:
-            self.current_base = base_name
+            if base_name != self.current_base: # 未变化时不重复记录/赋值
+                logger.info(f"设置基础姿势为 {base_name}")
+                self.current_base = base_name
             return True
         return False
     
     def set_emotion(self, emotion):
         """设置当前表情"""
-        if emotion in self.available_emotions.get(self.current_base, []):
-            logger.info(f"设置表情为 {emotion}")
-            self.current_emotion = emotion
+        if emotion in self._emotion_sets.get(self.current_base, frozenset()):
+            if emotion != self.current_emotion:
+                logger.info(f"设置表情为 {emotion}")
+                self.current_emotion = emotion
             return True
         return False
     
-    def get_scaled_image(self, pixmap, width=None, height=None):
-        """缩放图像，先移除透明区域再缩放"""
+    def _alpha_bbox(self, qimg):
+        """返回图像非透明区域的 QRect, 完全透明时返回 None"""
+        if qimg.format() not in (QImage.Format_ARGB32, QImage.Format_ARGB32_Premultiplied):
+            qimg = qimg.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+        img_width, img_height = qimg.width(), qimg.height()
+
+        # 每个像素作为一个 uint32 (0xAARRGGBB) 访问, alpha 非零即大于 0x00FFFFFF (不拷贝像素缓冲区)
+        ptr = qimg.constBits()
+        ptr.setsize(qimg.byteCount())
+        arr = np.frombuffer(ptr, dtype=np.uint32).reshape(img_height, img_width)
+        return _mask_bbox(arr > 0x00FFFFFF)
+
+    def get_scaled_image(self, pixmap, width=None, height=None, bbox=None):
+        """缩放图像，先移除透明区域再缩放; bbox 为已知的非透明区域时不再扫描像素"""
         if width is None:
             width = self.image_size[0]
         if height is None:
             height = self.image_size[1]
-        
-        # 将QPixmap转换为OpenCV格式
-        qimg = pixmap.toImage()
-        
-        # 获取图像尺寸和格式
-        img_width = qimg.width()
-        img_height = qimg.height()
-        
-        # 创建numpy数组来存储图像数据
-        ptr = qimg.constBits()
-        ptr.setsize(qimg.byteCount())
-        arr = np.array(ptr).reshape(img_height, img_width, 4)
-        
-        # 提取alpha通道
-        alpha = arr[:, :, 3]
-        
-        # 找到非透明区域
-        non_transparent = alpha > 0
-        
+
+        if bbox is None:
+            bbox = self._alpha_bbox(pixmap.toImage())
+
         # 如果图像完全透明，返回原始缩放
-        if not np.any(non_transparent):
+        if bbox is None or bbox.isEmpty():
             return pixmap.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        
-        # 找到非透明区域的边界
-        rows = np.any(non_transparent, axis=1)
-        cols = np.any(non_transparent, axis=0)
-        
-        # 获取非零区域的索引
-        y_indices = np.where(rows)[0]
-        x_indices = np.where(cols)[0]
-        
-        # 确保有非透明像素
-        if len(y_indices) == 0 or len(x_indices) == 0:
-            return pixmap.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        
-        y_min, y_max = y_indices[[0, -1]]
-        x_min, x_max = x_indices[[0, -1]]
-        
-        # 裁剪原始QImage
-        cropped_qimg = qimg.copy(x_min, y_min, x_max - x_min + 1, y_max - y_min + 1)
-        
-        # 转换回QPixmap
-        cropped_pixmap = QPixmap.fromImage(cropped_qimg)
-        
-        # 缩放裁剪后的图像
-        return cropped_pixmap.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-    
+
+        # 裁剪并缩放
+        return pixmap.copy(bbox).scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    def _layer_bbox(self, path, layer, scale=1.0):
+        """图层文件的非透明区域 (按路径、修改时间与加载比例缓存)"""
+        cache_key = (path, os.path.getmtime(path), scale)
+        if cache_key not in self._bbox_cache:
+            self._bbox_cache[cache_key] = _mask_bbox(layer[:, :, 3] > 0)
+        return self._bbox_cache[cache_key]
+
+    def _composite_key(self):
+        return (self.current_base, self.current_emotion, tuple(self.image_size))
+
     def get_composite_image(self):
-        """生成组合图像（基础姿势+表情差分）"""
+        """生成组合图像（基础姿势+表情差分）, 按 (姿势, 表情, 尺寸) 缓存"""
+        key = self._composite_key()
+        pixmap = _lru_get(self._composite_cache, key)
+        if pixmap is not None:
+            return pixmap
+
+        # 未缩放组合图只为头像保留; 显示路径缩放后即丢弃, 已有头像留下的组合图时直接复用
+        raw = _lru_get(self._raw_cache, key) or self._build_composite_raw()
+        if raw is None:
+            return QPixmap(*self.image_size)  # 返回空白图像, 不缓存以便资源恢复后重试
+        raw_pixmap, bbox = raw
+        pixmap = self.get_scaled_image(raw_pixmap, bbox=bbox)
+        _lru_put(self._composite_cache, key, pixmap, self.COMPOSITE_CACHE_SIZE)
+        return pixmap
+
+    def _layer_scale(self, base_path):
+        """图层加载比例: 只读 PNG 头获取原始尺寸, 保留至少显示尺寸的 LOAD_OVERSAMPLE 倍;
+        只取 1/n (n >= 2) 的整数倍缩小, INTER_AREA 在整数倍时走快速路径, 非整数比例的缩小本身比省下的混合/缩放开销更贵"""
+        size = QImageReader(base_path).size()
+        if not size.isValid() or size.isEmpty():
+            return 1.0
+        target_w, target_h = self.image_size
+        scale = max(target_w * self.LOAD_OVERSAMPLE / size.width(), target_h * self.LOAD_OVERSAMPLE / size.height())
+        factor = int(1 / scale) if scale > 0 else 1
+        return 1.0 / factor if factor >= 2 else 1.0
+
+    def _composite_raw(self):
+        """未缩放的组合图像及其非透明区域, 供头像裁剪使用, 按 (姿势, 表情, 尺寸) 缓存 (加载比例随尺寸变化); 基础图像无法加载时返回 None"""
+        key = self._composite_key()
+        raw = _lru_get(self._raw_cache, key)
+        if raw is None:
+            raw = self._build_composite_raw()
+            if raw is not None:
+                _lru_put(self._raw_cache, key, raw, self.RAW_CACHE_SIZE)
+        return raw
+
+    def _build_composite_raw(self):
+        """加载图层并组合, 返回 (组合图, 非透明区域); 基础图像无法加载时返回 None"""
         base_path = self.get_base_image_path()
         emotion_path = self.get_emotion_image_path()
         
-        # 加载基础图像
-        base_pixmap = QPixmap(base_path)
-        if base_pixmap.isNull():
+        # 加载基础图像; 只按显示尺寸的 LOAD_OVERSAMPLE 倍保留分辨率, 表情图层用同一比例以保持对齐
+        scale = self._layer_scale(base_path)
+        base_layer = _load_bgra(base_path, scale)
+        if base_layer is None:
             logger.warning(f"错误: 无法加载基础图像 {base_path}")
-            return QPixmap(*self.image_size)  # 返回空白图像
+            return None
             
         # 检查表情图像是否存在
         if not os.path.exists(emotion_path):
             logger.warning(f"警告: 表情图像不存在 {emotion_path}，仅使用基础图像")
-            return self.get_scaled_image(base_pixmap)
+            return _bgra_to_pixmap(base_layer), self._layer_bbox(base_path, base_layer, scale)
             
         # 加载表情图像
-        emotion_pixmap = QPixmap(emotion_path)
-        if emotion_pixmap.isNull():
+        emotion_layer = _load_bgra(emotion_path, scale)
+        if emotion_layer is None:
             logger.warning(f"错误: 无法加载表情图像 {emotion_path}")
-            return self.get_scaled_image(base_pixmap)
+            return _bgra_to_pixmap(base_layer), self._layer_bbox(base_path, base_layer, scale)
 
-            
-        # 创建组合图像
-        result = QPixmap(base_pixmap.size())
-        result.fill(Qt.transparent)
-        
-        painter = QPainter(result)
-        painter.drawPixmap(0, 0, base_pixmap)
-        painter.drawPixmap(0, 0, emotion_pixmap)
-        painter.end()
+        base_bbox = self._layer_bbox(base_path, base_layer, scale)
+        emotion_bbox = self._layer_bbox(emotion_path, emotion_layer, scale)
+
+        # 创建组合图像: 在预乘数组上以 numpy 向量化做 over 混合, 表情图层从 (0, 0) 对齐, 超出基础图像的部分裁掉
+        # 表情差分只覆盖脸部一小块, 其余位置 over 结果即基础图, 因此先整块拷贝基础图, 只在表情图层的非透明区域内混合
+        composite = self._composite_scratch
+        if composite is None or composite.shape != base_layer.shape:
+            composite = self._composite_scratch = np.empty_like(base_layer)
+        np.copyto(composite, base_layer)
+        if emotion_bbox is not None:
+            blend = emotion_bbox.intersected(QRect(0, 0, base_layer.shape[1], base_layer.shape[0]))
+            if not blend.isEmpty():
+                rows = slice(blend.top(), blend.bottom() + 1); cols = slice(blend.left(), blend.right() + 1)
+                _composite_over(base_layer[rows, cols], emotion_layer[rows, cols], out=composite[rows, cols])
+        result = _bgra_to_pixmap(composite)
 
-        return self.get_scaled_image(result)
+        # 组合图的非透明区域即两图层区域的并集 (限制在基础图像范围内), 无需再读取组合图像素
+        if base_bbox is None or emotion_bbox is None:
+            bbox = base_bbox or emotion_bbox
+        else:
+            bbox = base_bbox.united(emotion_bbox)
+        if bbox is not None:
+            bbox = bbox.intersected(result.rect())
+        return result, bbox
     
     def get_head_image(self, head_location: float = 0.3):
         """获取角色头部图像, head_location为头部下端位置比例"""
-        composite_image = self.get_composite_image()
+        key = (self._composite_key(), head_location)
+        head_pixmap = _lru_get(self._head_cache, key)
+        if head_pixmap is not None:
+            return head_pixmap
+
+        raw = self._composite_raw()
+        if raw is None:
+            composite_image = self.get_composite_image()
+            return composite_image.copy(0, 0, composite_image.width(), int(composite_image.height() * head_location))
 
-        # crop head
-        head_height = int(composite_image.height() * head_location)
-        head_pixmap = composite_image.copy(0, 0, composite_image.width(), head_height)
+        # 先在原尺寸组合图上裁出头部再缩放, 只平滑缩放用到的区域;
+        # 目标尺寸与整图缩放后再裁剪的结果一致
+        raw_pixmap, bbox = raw
+        if bbox is None or bbox.isEmpty():
+            bbox = raw_pixmap.rect()
+        scaled_size = bbox.size().scaled(self.image_size[0], self.image_size[1], Qt.KeepAspectRatio)
+        head_raw = raw_pixmap.copy(bbox.x(), bbox.y(), bbox.width(), max(1, int(bbox.height() * head_location)))
+        head_pixmap = head_raw.scaled(scaled_size.width(), int(scaled_size.height() * head_location),
+                                      Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
 
+        _lru_put(self._head_cache, key, head_pixmap, self.COMPOSITE_CACHE_SIZE)
         return head_pixmap
 
     